@@ -0,0 +1,81 @@
+"""
+对比清理空作用域前后 data.json 的体积与载入后的内存占用
+
+模拟旧版行为：每个执行过 list / look 的用户都会留下一条空记录
+用法: python benchmarks/bench_data_compaction.py [用户数] [有数据的用户比例]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.data_manager import DataManager  # noqa: E402
+
+
+def build_data(users: int, active_ratio: float) -> dict:
+    """users 个用户中只有 active_ratio 比例保存过服务器，其余为空记录"""
+    active = int(users * active_ratio)
+    user_scopes = {}
+    for i in range(users):
+        user_id = str(1000000000 + i)
+        user_scopes[user_id] = {"home": f"mc{i}.example.com"} if i < active else {}
+    groups = {str(500000 + i): {} for i in range(users // 10)}
+    return {"global": {}, "group_id": groups, "user_id": user_scopes}
+
+
+def measure_load(config_dir: Path) -> tuple[DataManager, int]:
+    """载入数据并返回 (DataManager, 载入后保留的内存字节数)"""
+    gc.collect()
+    tracemalloc.start()
+    manager = DataManager(config_dir=config_dir)
+    manager.load_config()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return manager, current
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    active_ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_dir = Path(tmp)
+        data_file = config_dir / "data.json"
+        with open(data_file, "w", encoding="utf-8") as file:
+            json.dump(build_data(users, active_ratio), file, indent=2, ensure_ascii=False)
+        before_size = os.path.getsize(data_file)
+
+        # 载入时清理空记录，并在没有事件循环时直接写回
+        manager, after_memory = measure_load(config_dir)
+        after_size = os.path.getsize(data_file)
+
+        # 对照：不清理时直接载入原始数据的内存占用
+        gc.collect()
+        tracemalloc.start()
+        raw = build_data(users, active_ratio)
+        gc.collect()
+        before_memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del raw
+
+        scopes = len(manager.config_data["user_id"]) + len(manager.config_data["group_id"])
+        print(f"users={users} active={active_ratio:.0%} scopes after compaction={scopes}")
+        print(f"{'':<12}{'file KB':>12}{'memory KB':>12}")
+        print(f"{'before':<12}{before_size / 1024:>12.0f}{before_memory / 1024:>12.0f}")
+        print(f"{'after':<12}{after_size / 1024:>12.0f}{after_memory / 1024:>12.0f}")
+
+        # 只读查询不再产生新的空记录
+        for i in range(1000):
+            manager.get_all_configs(None, str(2000000000 + i))
+            manager.get_server_addr("home", None, str(2000000000 + i))
+        print(f"scopes after 1000 passer-by reads={len(manager.config_data['user_id']) + len(manager.config_data['group_id'])}")
+
+
+if __name__ == "__main__":
+    main()
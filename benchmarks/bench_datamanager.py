@@ -0,0 +1,76 @@
+"""
+对比 DataManager 每次修改立即写盘与延迟合并写盘的修改吞吐量
+
+用法: python benchmarks/bench_datamanager.py [作用域数量] [修改次数]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.data_manager import DataManager  # noqa: E402
+
+
+def build_manager(config_dir: Path, scopes: int, save_delay: float = 1.0) -> DataManager:
+    """生成含 scopes 个群组、每群 3 个服务器的数据"""
+    manager = DataManager(config_dir=config_dir, save_delay=save_delay)
+    manager.config_data = {
+        "global": {},
+        "group_id": {str(100000 + i): {f"server{j}": f"mc{i}-{j}.example.com" for j in range(3)} for i in range(scopes)},
+        "user_id": {},
+    }
+    manager.save_config()
+    return manager
+
+
+def mutate(manager: DataManager, i: int):
+    group_id = str(100000 + i % 1000)
+    manager.add_server_addr(f"bench{i}", f"bench{i}.example.com", group_id, None)
+
+
+def bench_sync(scopes: int, mutations: int) -> float:
+    """不在事件循环中调用时，每次修改都会立即写盘（与旧版行为一致）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = build_manager(Path(tmp), scopes)
+        start = time.perf_counter()
+        for i in range(mutations):
+            mutate(manager, i)
+        return time.perf_counter() - start
+
+
+async def bench_write_behind(scopes: int, mutations: int) -> tuple[float, float]:
+    """返回 (修改阶段耗时, 含最终写盘的总耗时)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = build_manager(Path(tmp), scopes)
+        start = time.perf_counter()
+        for i in range(mutations):
+            mutate(manager, i)
+            # 模拟指令间隙，让后台写盘有机会执行
+            if i % 50 == 0:
+                await asyncio.sleep(0)
+        mutate_elapsed = time.perf_counter() - start
+        await manager.close()
+        return mutate_elapsed, time.perf_counter() - start
+
+
+def main():
+    scopes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    mutations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        build_manager(Path(tmp), scopes)
+        data_kb = os.path.getsize(Path(tmp) / "data.json") / 1024
+    print(f"scopes={scopes} mutations={mutations} data.json={data_kb:.0f}KB")
+
+    sync_elapsed = bench_sync(scopes, mutations)
+    print(f"{'sync write':<20}{mutations / sync_elapsed:>12.0f} ops/s{sync_elapsed * 1000:>12.1f} ms")
+
+    mutate_elapsed, total_elapsed = asyncio.run(bench_write_behind(scopes, mutations))
+    print(f"{'write-behind':<20}{mutations / mutate_elapsed:>12.0f} ops/s{total_elapsed * 1000:>12.1f} ms (incl. final flush)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+对比各输出格式的编码耗时与图片体积
+
+用法: python benchmarks/bench_encode.py [重复次数]
+"""
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFilter, ImageOps
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.encoder import encode_image  # noqa: E402
+
+OPTIONS = [
+    ("png level 6", {"format": "png", "png_compress_level": 6}),
+    ("png level 1", {"format": "png", "png_compress_level": 1}),
+    ("png level 9", {"format": "png", "png_compress_level": 9}),
+    ("png_palette", {"format": "png_palette"}),
+    ("jpeg q85", {"format": "jpeg", "quality": 85}),
+    ("jpeg q70", {"format": "jpeg", "quality": 70}),
+    ("webp q85", {"format": "webp", "quality": 85}),
+    ("webp q70", {"format": "webp", "quality": 70}),
+    ("png <= 150KB", {"format": "png", "max_kb": 150}),
+    ("jpeg <= 60KB", {"format": "jpeg", "quality": 90, "max_kb": 60}),
+    ("webp <= 40KB", {"format": "webp", "quality": 90, "max_kb": 40}),
+]
+
+
+def build_sample(W: int = 1200, H: int = 580) -> Image.Image:
+    """生成与状态卡片相近的测试图：模糊背景 + 半透明卡片 + 文字"""
+    bg_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "bg.jpg")
+    with Image.open(bg_path) as src:
+        bg = ImageOps.fit(src, (W, H), method=Image.Resampling.LANCZOS)
+    bg = bg.filter(ImageFilter.GaussianBlur(12)).convert("RGBA")
+    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    draw.rounded_rectangle((35, 35, W - 35, H - 35), radius=35, fill=(255, 255, 255, 235))
+    for i in range(8):
+        draw.text((80, 80 + i * 50), f"Minecraft Server Status line {i} 在线人数 {i * 13}/100", fill=(90, 80, 105))
+    draw.rounded_rectangle((75, H - 125, W - 75, H - 105), radius=10, fill=(170, 230, 255))
+    return Image.alpha_composite(bg, overlay)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    img = build_sample()
+    print(f"{'option':<16}{'ms/encode':>12}{'KB':>10}")
+    for name, options in OPTIONS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            data = encode_image(img, options)
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name:<16}{elapsed:>12.1f}{len(data) / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
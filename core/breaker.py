@@ -0,0 +1,62 @@
+import random
+import time
+from collections import OrderedDict
+
+
+class _Circuit:
+    __slots__ = ("failures", "offline_since", "retry_at", "probing")
+
+    def __init__(self):
+        self.failures = 0
+        self.offline_since = time.time()
+        self.retry_at = 0.0
+        self.probing = False
+
+
+class CircuitBreaker:
+    """
+    按地址记录连续失败：失败后熔断一段时间（指数退避），期间直接判定离线不再探测；
+    退避结束后只放行一次试探（半开），成功即恢复，失败则加倍退避
+    """
+
+    def __init__(self, base_backoff: float = 10, max_backoff: float = 300, max_size: int = 1024):
+        self.base_backoff = max(base_backoff, 0)
+        self.max_backoff = max(max_backoff, self.base_backoff)
+        self.max_size = max(int(max_size), 1)
+        self._circuits: OrderedDict[str, _Circuit] = OrderedDict()
+
+    def is_open(self, key: str) -> bool:
+        """为 True 时应直接返回离线，不发起探测"""
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            return False
+        # 半开状态下已有试探在进行，其余请求不再等待
+        return circuit.probing or time.monotonic() < circuit.retry_at
+
+    def offline_since(self, key: str) -> float | None:
+        circuit = self._circuits.get(key)
+        return circuit.offline_since if circuit is not None else None
+
+    def begin_probe(self, key: str):
+        circuit = self._circuits.get(key)
+        if circuit is not None:
+            circuit.probing = True
+
+    def record_success(self, key: str):
+        self._circuits.pop(key, None)
+
+    def record_failure(self, key: str):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit()
+            while len(self._circuits) > self.max_size:
+                self._circuits.popitem(last=False)
+        self._circuits.move_to_end(key)
+        circuit.failures += 1
+        circuit.probing = False
+        backoff = min(self.base_backoff * 2 ** min(circuit.failures - 1, 16), self.max_backoff)
+        # 随机抖动，避免大量地址在同一时刻集中重试
+        circuit.retry_at = time.monotonic() + backoff * random.uniform(0.8, 1.0)
+
+    def clear(self):
+        self._circuits.clear()
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class TTLCache:
+    """
+    带过期时间的 LRU 缓存，支持同键并发请求合并
+    stale_ttl > 0 时，过期后的宽限期内仍可返回旧值，同时在后台刷新
+    """
+
+    def __init__(self, ttl: float, max_size: int, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, 0)
+        self.max_size = max(int(max_size), 1)
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _lookup(self, key: str) -> tuple[Any, bool] | None:
+        """返回 (值, 是否未过期)；超出宽限期的条目直接删除"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        now = time.monotonic()
+        if expires_at + self.stale_ttl < now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value, expires_at >= now
+
+    def get(self, key: str) -> Any | None:
+        found = self._lookup(key)
+        if found is None or not found[1]:
+            return None
+        return found[0]
+
+    def set(self, key: str, value: Any):
+        if self.ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        # 超出容量时淘汰最久未使用的条目
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def refresh(self, key: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """无论是否命中都发起一次刷新，已有同键请求时复用该请求"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, factory))
+            self._inflight[key] = task
+        return task
+
+    async def cancel_inflight(self):
+        """取消并等待所有进行中的请求，卸载时在关闭存储之前调用"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_or_fetch(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any | None:
+        """命中缓存直接返回；否则同一个键只发起一次请求，其余调用者共享结果"""
+        found = self._lookup(key)
+        if found is not None:
+            value, fresh = found
+            if not fresh:
+                # 宽限期内先返回旧值，后台刷新
+                self.refresh(key, factory)
+            return value
+
+        # shield: 单个调用者被取消时不影响其他等待者
+        return await asyncio.shield(self.refresh(key, factory))
+
+    async def _fetch(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any | None:
+        try:
+            value = await factory()
+            # 失败结果不缓存，同时丢弃旧值，避免继续返回过时的在线状态
+            if value is not None:
+                self.set(key, value)
+            else:
+                self.pop(key)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+
+class BytesLRUCache:
+    """
+    同时按条目数与总字节数限制容量的 LRU 缓存
+    sizeof 计算条目占用的字节数，默认按 len 计算，缓存图片等对象时可替换
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, sizeof: Callable[[Any], int] = len):
+        self.max_entries = max(int(max_entries), 0)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self._data: OrderedDict[Any, Any] = OrderedDict()
+
+    def get(self, key: Any) -> Any | None:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any):
+        size = self.sizeof(value)
+        # 单个条目超出总预算时不缓存
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        self.pop(key)
+        self._data[key] = value
+        self.total_bytes += size
+        self.trim()
+
+    def trim(self):
+        """淘汰最久未使用的条目，直到满足条目数与字节数限制；调整上限后可直接调用"""
+        while self._data and (len(self._data) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, evicted = self._data.popitem(last=False)
+            self.total_bytes -= self.sizeof(evicted)
+
+    def pop(self, key: Any):
+        value = self._data.pop(key, None)
+        if value is not None:
+            self.total_bytes -= self.sizeof(value)
+
+    def clear(self):
+        self._data.clear()
+        self.total_bytes = 0
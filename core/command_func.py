@@ -1,27 +1,59 @@
-import glob
+import asyncio
+import datetime
+import hashlib
+import json
 import os
 import time
-import uuid
+from collections.abc import Mapping
 
 from mcstatus import JavaServer
 
 from astrbot.api import AstrBotConfig, logger
 from astrbot.api.event import AstrMessageEvent
 
-from .data_manager import DataManager
-from .draw import Draw
+from .breaker import CircuitBreaker
+from .cache import BytesLRUCache, TTLCache
+from .data_manager import DataManager, canonical_addr
+from .draw import TEMPLATE_VERSION
+from .encoder import get_extension
+from .history import RANGES, HistoryStore
+from .image_store import ImageRotation
+from .poller import StatusPoller
+from .render_pool import RenderPool
+from .resolver import DEFAULT_PORT, SrvResolver
+
+# 帮助列表：(指令, 描述)
+HELP_ITEMS = [
+    ("help", "获取此帮助信息"),
+    ("motd <IP>", "获取服务器状态/延迟"),
+    ("players <IP>", "获取在线玩家列表(失效)"),
+    ("add <Name> <IP>", "添加常用服务器"),
+    ("del <Name>", "删除已存服务器"),
+    ("look <Name>", "查询已存服务器"),
+    ("list [页码]", "分页显示服务器列表"),
+    ("all [页码]", "批量查询已存服务器状态"),
+    ("trend <Name> [24h|7d]", "查看延迟与在线人数趋势"),
+    ("clear", "清空所有 (*仅管理)"),
+    ("stats", "地址引用统计 (*仅管理)")
+]
 
 
 class CommandFunc:
-    def __init__(self, admin_list: list, datamanager: DataManager, plugin_version: str, config: AstrBotConfig, plugin_data_dir: str):
+    def __init__(self, admin_list: list, datamanager: DataManager, plugin_version: str, config: AstrBotConfig, plugin_data_dir: str,
+                 data_loaded: bool = True):
         self.admin_list = admin_list
         self.datamanager = datamanager
         self.plugin_version = plugin_version
         self.config = config
         self.plugin_data_dir = plugin_data_dir
+        # 数据载入失败时不清理历史记录，避免按空的地址集合删除全部文件
+        self.data_loaded = data_loaded
 
+        # 文件发送方式下生成图片的滚动缓存
         self.images_dir = os.path.join(plugin_data_dir, "data")
-        os.makedirs(self.images_dir, exist_ok=True)
+        self.image_rotation = ImageRotation(images_dir=self.images_dir,
+                                            max_count=config.get("max_temp", 5),
+                                            max_bytes=config.get("max_temp_mb", 0) * 1024 * 1024)
 
         bg_name = config.get("bg", "bg.jpg")
         if isinstance(bg_name, dict):
@@ -29,25 +61,96 @@ class CommandFunc:
 
         self.bg_name = str(bg_name)
 
-    def _get_new_image_path(self) -> str:
-        """生成新的图片路径并清理旧缓存"""
-        max_temp = self.config.get("max_temp", 5)
-
-        # 清理旧缓存
-        existing_images = glob.glob(os.path.join(self.images_dir, "*.png"))
-        if len(existing_images) >= max_temp:
-            # 按修改时间排序，最旧的在前面
-            existing_images.sort(key=os.path.getmtime)
-            # 删除多余的图片
-            for img_to_del in existing_images[:len(existing_images) - max_temp + 1]:
-                try:
-                    os.remove(img_to_del)
-                except Exception as e:
-                    logger.error(f"清理缓存图片失败: {e}")
-
-        # 生成新路径
-        new_filename = f"mcstatus_{int(time.time())}_{uuid.uuid4().hex[:8]}.png"
-        return os.path.join(self.images_dir, new_filename)
+        # 服务器状态缓存
+        cache_conf = config.get("status_cache", {})
+        poller_conf = config.get("poller", {})
+        stale_ttl = cache_conf.get("stale_ttl", 0)
+        if poller_conf.get("enabled", False):
+            # 开启后台轮询时，旧快照至少保留到下一轮轮询完成
+            stale_ttl = max(stale_ttl, poller_conf.get("interval", 60) + poller_conf.get("jitter", 10)
+                            + poller_conf.get("timeout", 10))
+        self.status_cache = TTLCache(ttl=cache_conf.get("ttl", 10),
+                                     max_size=cache_conf.get("max_size", 256),
+                                     stale_ttl=stale_ttl)
+
+        # SRV 解析缓存
+        dns_conf = config.get("dns", {})
+        self.resolver = None
+        if dns_conf.get("enabled", True):
+            self.resolver = SrvResolver(min_ttl=dns_conf.get("min_ttl", 30),
+                                        max_ttl=dns_conf.get("max_ttl", 3600),
+                                        negative_ttl=dns_conf.get("negative_ttl", 300))
+
+        # 无法连接的地址熔断，避免重复等待超时
+        breaker_conf = config.get("breaker", {})
+        self.breaker = None
+        if breaker_conf.get("enabled", True):
+            self.breaker = CircuitBreaker(base_backoff=breaker_conf.get("base_backoff", 10),
+                                          max_backoff=breaker_conf.get("max_backoff", 300))
+
+        # 延迟与在线人数历史
+        self.history = None
+        if config.get("history", {}).get("enabled", True):
+            self.history = HistoryStore(os.path.join(plugin_data_dir, "history"))
+            # 清理已不再保存的地址留下的历史文件
+            if data_loaded:
+                self.history.prune(self.datamanager.get_all_server_addrs())
+
+        # 后台轮询已保存的服务器
+        self.poller = None
+        if poller_conf.get("enabled", False):
+            self.poller = StatusPoller(get_addresses=self.datamanager.get_all_server_addrs,
+                                       refresh=self._refresh_status,
+                                       interval=poller_conf.get("interval", 60),
+                                       jitter=poller_conf.get("jitter", 10),
+                                       concurrency=poller_conf.get("concurrency", 4),
+                                       timeout=poller_conf.get("timeout", 10))
+
+        # 绘图执行池
+        render_conf = config.get("render", {})
+        self.render_pool = RenderPool(executor=render_conf.get("executor", "thread"),
+                                      workers=render_conf.get("workers", 2),
+                                      max_queue=render_conf.get("max_queue", 8))
+
+        # 成品卡片缓存
+        card_cache_conf = config.get("card_cache", {})
+        self.card_cache = BytesLRUCache(max_entries=card_cache_conf.get("max_entries", 64),
+                                        max_bytes=card_cache_conf.get("max_mb", 16) * 1024 * 1024)
+
+        # 输出编码设置
+        self.output_options = dict(config.get("output", {}))
+        # 画质档位：整体缩放与背景模糊降采样
+        self.render_options = {
+            "scale": render_conf.get("scale", 1.0),
+            "blur_downscale": render_conf.get("blur_downscale", 4),
+        }
+        # 影响成品图的渲染设置，作为各类图片缓存键的一部分
+        self.settings_key = json.dumps({"output": self.output_options, "render": self.render_options}, sort_keys=True)
+        # 渲染进程内中间画布缓存的内存预算，不影响成品图，不计入缓存键
+        self.render_options["base_layer_mb"] = card_cache_conf.get("base_layer_mb", 32)
+        self.render_options["card_static_mb"] = card_cache_conf.get("static_layer_mb", 24)
+
+        # 静态页面（帮助、空列表）：(类型, 版本, 字体, 背景) -> 图片
+        self._static_pages: dict[tuple, bytes] = {}
+
+    def start_poller(self):
+        if self.poller is not None:
+            self.poller.start()
+
+    async def stop_poller(self):
+        """停止后台轮询，并取消仍在进行的探测，之后才能关闭历史记录与数据存储"""
+        if self.poller is not None:
+            await self.poller.stop()
+        await self.status_cache.cancel_inflight()
+
+    def shutdown(self):
+        self.render_pool.shutdown()
+        if self.history is not None:
+            self.history.close()
+
+    @property
+    def delivery_mode(self) -> str:
+        return self.config.get("delivery_mode", "memory")
 
     @property
     def is_global(self) -> bool:
@@ -59,7 +162,7 @@ class CommandFunc:
         尝试查询服务器信息，支持自动重试和超时处理
         """
         try:
-            server = await JavaServer.async_lookup(server_addr)
+            server = await self._resolve_server(server_addr)
             status = await server.async_status()
             return server, status
         except Exception as e:
@@ -70,30 +173,130 @@ class CommandFunc:
                 logger.error(f"查询服务器 {server_addr} 失败: {error_msg}")
             return None, None
 
+    async def _resolve_server(self, server_addr: str) -> JavaServer:
+        """
+        带端口的地址直接连接；未带端口时从缓存取 SRV 解析结果，不再每次查询 DNS
+        A/AAAA 仍由系统解析，握手包需要携带主机名
+        """
+        host, sep, port = server_addr.rpartition(":")
+        if sep and port.isdigit():
+            return JavaServer(host, int(port))
+        if self.resolver is None or sep:
+            return await JavaServer.async_lookup(server_addr)
+        target_host, target_port = await self.resolver.resolve(server_addr)
+        return JavaServer(target_host, target_port)
+
+    async def _race_lookup(self, candidates: list[str]) -> tuple[str, object, object]:
+        """
+        同时探测多个候选地址，返回第一个成功的结果并取消其余探测
+        """
+        tasks = {asyncio.ensure_future(self._lookup_server(addr)): addr for addr in candidates}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 同一轮完成时按候选顺序优先
+                for task in sorted(done, key=lambda t: candidates.index(tasks[t])):
+                    server, status = task.result()
+                    if status is not None:
+                        return tasks[task], server, status
+            return candidates[0], None, None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _probe_candidates(self, server_addr: str) -> list[str]:
+        """
+        未带端口的地址需要探测的候选：原始地址与补全默认端口的地址
+        已有 SRV 解析缓存时先解析，没有 SRV 记录（解析结果就是 host:25565）时两者相同，只探测一次
+        """
+        if ":" in server_addr:
+            return [server_addr]
+        if self.resolver is not None:
+            target = await self.resolver.resolve(server_addr)
+            if target == (server_addr.lower().rstrip("."), DEFAULT_PORT):
+                return [server_addr]
+        return [server_addr, f"{server_addr}:{DEFAULT_PORT}"]
+
     async def get_server_status(self, server_addr: str) -> dict | None:
+        """
+        获取服务器状态，优先使用缓存，同一台服务器（规范化地址相同）的并发查询只发起一次探测
+        """
         try:
             if not server_addr:
                 return None
-            server_addr = server_addr.strip()
+            server_addr = canonical_addr(server_addr)
         except Exception:
             return None
+        if not server_addr:
+            return None
 
-        try:
-            # 第一次尝试：原始地址
-            server, status = await self._lookup_server(server_addr)
+        if self.breaker is not None and self.breaker.is_open(server_addr):
+            return None
+        status = await self.status_cache.get_or_fetch(server_addr, lambda: self._probe_and_record(server_addr))
+        if status is None:
+            return None
+        return dict(status)
 
-            # 第二次尝试：如果失败且没有端口，补全默认端口 25565
-            if status is None and ":" not in server_addr:
-                retry_addr = f"{server_addr}:25565"
-                server, status = await self._lookup_server(retry_addr)
-                if status is not None:
-                    server_addr = retry_addr
+    async def _refresh_status(self, server_addr: str) -> dict | None:
+        """强制刷新一个地址的缓存状态，供后台轮询调用"""
+        server_addr = canonical_addr(server_addr)
+        if self.breaker is not None and self.breaker.is_open(server_addr):
+            return None
+        # shield: 轮询超时取消时，不影响正在等待同一请求的指令
+        return await asyncio.shield(
+            self.status_cache.refresh(server_addr, lambda: self._probe_and_record(server_addr))
+        )
+
+    async def _probe_and_record(self, server_addr: str) -> dict | None:
+        """探测服务器状态，更新熔断状态，并把结果（含离线）写入历史记录"""
+        if self.breaker is not None:
+            self.breaker.begin_probe(server_addr)
+        status = None
+        try:
+            status = await self._fetch_server_status(server_addr)
+        finally:
+            # 探测被取消时也按失败处理，避免熔断停留在试探中
+            if self.breaker is not None:
+                if status is None:
+                    self.breaker.record_failure(server_addr)
+                else:
+                    self.breaker.record_success(server_addr)
+        if self.history is not None:
+            loop = asyncio.get_running_loop()
+            try:
+                # 只为已保存的服务器记录历史，临时查询的地址不落盘
+                if self.datamanager.has_server_addr(server_addr):
+                    await loop.run_in_executor(None, self.history.append, server_addr, time.time(), status)
+            except Exception as e:
+                logger.error(f"写入历史记录失败: {e}")
+        return status
+
+    async def _fetch_server_status(self, server_addr: str) -> dict | None:
+        try:
+            candidates = await self._probe_candidates(server_addr)
+            race = self.config.get("query", {}).get("race_default_port", True)
+            if race and len(candidates) > 1:
+                # 原始地址与补全默认端口的地址同时探测，取先成功者
+                server_addr, server, status = await self._race_lookup(candidates)
+            else:
+                # 依次尝试：原始地址失败后再补全默认端口 25565
+                server, status = None, None
+                for candidate in candidates:
+                    server, status = await self._lookup_server(candidate)
+                    if status is not None:
+                        server_addr = candidate
+                        break
 
             if status is None:
                 return None
 
             motd_raw = "Unknown"
-            if hasattr(status, "description"):
+            raw = getattr(status, "raw", None)
+            if isinstance(raw, dict) and raw.get("description"):
+                # 原始描述可能是 JSON 文本组件，交由绘图时解析
+                motd_raw = raw["description"]
+            elif hasattr(status, "description"):
                 motd_raw = status.description
             elif hasattr(status, "motd"):
                 motd_raw = status.motd.to_minecraft()
@@ -114,7 +317,9 @@ class CommandFunc:
                 "version": status.version.name,
                 "protocol": status.version.protocol,
                 "players": players_list,
-                "server_icon": icon
+                "server_icon": icon,
+                # 探测时间：来自缓存或后台轮询的结果据此显示实际查询时间
+                "checked_at": time.time()
             }
         except Exception as e:
             logger.error(f"获取服务器状态出错: {str(e)}")
@@ -122,61 +327,156 @@ class CommandFunc:
             traceback.print_exc()
             return None
 
-    async def _generate_image_response(self, data_map: dict) -> tuple[bool, str]:
-        font_name = self.config["font"]
-        drawer = Draw(output_path=self._get_new_image_path(), bg_path=self.bg_name)
-        success, result = await drawer.draw_card(data_map, font_name)
+    async def _prune_history(self):
+        """删除、修改、清空服务器后，清理不再被引用的地址的历史文件"""
+        if self.history is None or not self.data_loaded:
+            return
+        keep = self.datamanager.get_all_server_addrs()
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.history.prune, keep)
+        except Exception as e:
+            logger.error(f"清理历史记录失败: {e}")
+
+    async def _render_image(self, kind: str, data_map: dict, cache_key: str | None = None, static: bool = False) -> tuple[bool, str | bytes]:
+        """
+        在渲染池中绘图，内存模式直接返回图片数据，文件模式写入缓存目录并返回路径
+        提供 cache_key 时复用已渲染的卡片；static 为 True 时按 (版本, 字体, 背景) 只渲染一次
+        """
+        static_key = (kind, self.plugin_version, self.config["font"], self.bg_name, self.settings_key) if static else None
+        if static_key:
+            result = self._static_pages.get(static_key)
+        else:
+            result = self.card_cache.get(cache_key) if cache_key else None
+
+        if result is None:
+            font_name = self.config["font"]
+            success, result = await self.render_pool.render(kind, data_map, font_name, self.bg_name,
+                                                             self.output_options, self.render_options)
+            if not success:
+                return False, result
+            if static_key:
+                # 配置变化后丢弃同类旧页面
+                self._static_pages = {k: v for k, v in self._static_pages.items() if k[0] != kind}
+                self._static_pages[static_key] = result
+            elif cache_key:
+                self.card_cache.set(cache_key, result)
+
+        if self.delivery_mode == "memory":
+            return True, result
+
+        output_path = self.image_rotation.new_path(get_extension(self.output_options))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_image, output_path, result)
+        return True, output_path
+
+    def _normalize_card_data(self, data_map: dict) -> dict:
+        """
+        规整卡片数据：延迟按步长取整、查询时间按时间窗口取整，使相同状态得到相同画面
+        查询时间取探测结果的时间而非当前时间，缓存或轮询得到的旧结果不会显示为刚刚查询
+        """
+        conf = self.config.get("card_cache", {})
+        data_map = dict(data_map)
+
+        latency_step = conf.get("latency_step", 0)
+        latency = data_map.get("latency")
+        if latency_step > 0 and isinstance(latency, (int, float)):
+            rounded = int(round(latency / latency_step) * latency_step)
+            # 有响应的服务器不显示 0ms，低于一个步长时保留实际延迟
+            data_map["latency"] = rounded if rounded > 0 else max(int(round(latency)), 1)
+
+        time_window = max(conf.get("time_window", 60), 1)
+        checked_at = int(data_map.pop("checked_at", None) or time.time())
+        data_map["time"] = datetime.datetime.fromtimestamp(checked_at - checked_at % time_window).strftime("%Y/%m/%d %H:%M")
+        return data_map
+
+    def _card_cache_key(self, data_map: dict) -> str:
+        icon = data_map.get("server_icon") or ""
+        payload = {
+            "motd": data_map.get("motd_raw"),
+            "addr": data_map.get("addr"),
+            "version": data_map.get("version"),
+            "protocol": data_map.get("protocol"),
+            "latency": data_map.get("latency"),
+            "online": data_map.get("online"),
+            "max": data_map.get("max"),
+            "players": data_map.get("players"),
+            "icon": hashlib.sha1(icon.encode()).hexdigest(),
+            "time": data_map.get("time"),
+            "font": self.config["font"],
+            "bg": self.bg_name,
+            "template": TEMPLATE_VERSION,
+            "settings": self.settings_key,
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _write_image(self, output_path: str, data: bytes):
+        with open(output_path, "wb") as file:
+            file.write(data)
+        self.image_rotation.add(output_path, len(data))
+
+    async def _generate_image_response(self, data_map: dict) -> tuple[bool, str | bytes]:
+        data_map = self._normalize_card_data(data_map)
+        success, result = await self._render_image("card", data_map, cache_key=self._card_cache_key(data_map))
         if success:
             return True, result
         else:
             return False, f"❌ 图片生成失败: {result}"
 
     # 帮助图片生成专用入口
-    async def _generate_help_response(self, data_map: dict) -> tuple[bool, str]:
-        font_name = self.config["font"]
-        drawer = Draw(output_path=self._get_new_image_path(), bg_path=self.bg_name)
-        success, result = await drawer.draw_help(data_map, font_name)
+    async def _generate_help_response(self, data_map: dict) -> tuple[bool, str | bytes]:
+        success, result = await self._render_image("help", data_map, static=True)
         if success:
             return True, result
         else:
             return False, f"❌ 帮助生成失败: {result}"
 
     # 列表图片生成专用入口
-    async def _generate_list_response(self, data_map: dict) -> tuple[bool, str]:
-        font_name = self.config["font"]
-        drawer = Draw(output_path=self._get_new_image_path(), bg_path=self.bg_name)
-        success, result = await drawer.draw_list(data_map, font_name)
+    async def _generate_list_response(self, data_map: dict, cache_key: str | None = None) -> tuple[bool, str | bytes]:
+        # 空列表除时间外画面固定，作为静态页面渲染
+        if not data_map.get("servers"):
+            data_map = {"servers": {}, "show_time": False}
+            success, result = await self._render_image("list", data_map, static=True)
+        else:
+            success, result = await self._render_image("list", data_map, cache_key=cache_key)
         if success:
             return True, result
         else:
             return False, f"❌ 列表生成失败: {result}"
 
-    async def _handle_motd(self, event: AstrMessageEvent, server_addr: str) -> tuple[bool, str]:
+    async def _handle_motd(self, event: AstrMessageEvent, server_addr: str) -> tuple[bool, str | bytes]:
         if not server_addr:
             return False, "用法：/mcstatus motd <地址>"
 
         server_status = await self.get_server_status(server_addr)
         if server_status is None:
-             return False, "❌ 无法连接服务器，请检查地址。"
+            since = self.breaker.offline_since(canonical_addr(server_addr)) if self.breaker is not None else None
+            if since is not None:
+                since_text = datetime.datetime.fromtimestamp(since).strftime("%m/%d %H:%M")
+                return False, f"❌ 服务器自 {since_text} 起无法连接，请稍后再试。"
+            return False, "❌ 无法连接服务器，请检查地址。"
 
         data_map = {
             "server_icon": server_status.get("server_icon"),
             "motd_raw": server_status.get("motd_raw"),
-            "addr": server_status.get("server_addr"),
+            # 显示用户输入的原始写法，规范化地址只作为缓存键
+            "addr": server_addr.strip(),
             "version": server_status.get("version"),
             "protocol": server_status.get("protocol"),
             "latency": server_status.get("latency"),
             "online": server_status.get("online"),
             "max": server_status.get("max"),
-            "players": server_status.get("players")
+            "players": server_status.get("players"),
+            "checked_at": server_status.get("checked_at")
         }
 
         return await self._generate_image_response(data_map)
 
-    async def _handle_players(self, event: AstrMessageEvent, server_addr: str = "") -> tuple[bool, str]:
+    async def _handle_players(self, event: AstrMessageEvent, server_addr: str = "") -> tuple[bool, str | bytes]:
         return await self._handle_motd(event, server_addr)
 
-    async def _handle_look(self, event: AstrMessageEvent, server_name: str) -> tuple[bool, str]:
+    async def _handle_look(self, event: AstrMessageEvent, server_name: str) -> tuple[bool, str | bytes]:
         if not server_name:
             return False, "用法：/mcs look <名称>"
         addr = self.datamanager.get_server_addr(server_name, event.get_group_id(), event.get_sender_id(), self.is_global)
@@ -184,30 +484,136 @@ class CommandFunc:
             return False, f"❌ 未找到 {server_name}"
         return await self._handle_motd(event, addr)
 
-    async def _handle_list(self, event: AstrMessageEvent) -> tuple[bool, str]:
+    def _paginate(self, data: Mapping[str, str], page: str) -> tuple[list, int, int, int] | None:
+        """按配置的每页数量分页，返回 (当前页条目, 页码, 总页数, 起始序号)；页码无效时返回 None"""
+        try:
+            page_num = int(page) if page else 1
+        except ValueError:
+            return None
+        page_size = max(self.config.get("list_page_size", 10), 1)
+        total_pages = max(-(-len(data) // page_size), 1)
+        if page_num < 1 or page_num > total_pages:
+            return None
+        start = (page_num - 1) * page_size
+        return list(data.items())[start:start + page_size], page_num, total_pages, start + 1
+
+    async def _handle_list(self, event: AstrMessageEvent, page: str = "") -> tuple[bool, str | bytes]:
+        group_id, user_id = event.get_group_id(), event.get_sender_id()
+        data = self.datamanager.get_all_configs(group_id, user_id, self.is_global)
+        if not data:
+            return await self._generate_list_response({"servers": {}})
+
+        paged = self._paginate(data, page)
+        if paged is None:
+            return False, "❌ 页码无效，用法：/mcs list [页码]"
+        items, page_num, total_pages, start_index = paged
+        data_map = {
+            "servers": dict(items),
+            "total": len(data),
+            "page": page_num,
+            "total_pages": total_pages,
+            "start_index": start_index,
+            "show_time": False
+        }
+        # 作用域数据未修改时复用已渲染的页面
+        revision = self.datamanager.get_revision(group_id, user_id, self.is_global)
+        scope = self.datamanager.scope_key(group_id, user_id, self.is_global)
+        page_size = self.config.get("list_page_size", 10)
+        cache_key = f"list:{scope}:{revision}:{page_num}:{page_size}:{self.config['font']}:{self.bg_name}:{TEMPLATE_VERSION}:{self.settings_key}"
+        return await self._generate_list_response(data_map, cache_key=cache_key)
+
+    async def _probe_with_deadline(self, semaphore: asyncio.Semaphore, name: str, addr: str, timeout: float) -> tuple[str, dict | None, str]:
+        await semaphore.acquire()
+        task = asyncio.ensure_future(self.get_server_status(addr))
+        # 超时只是不再等待结果，底层探测仍在进行；探测真正结束后才释放并发槽位
+        task.add_done_callback(lambda _: semaphore.release())
+        try:
+            return name, await asyncio.wait_for(asyncio.shield(task), timeout), ""
+        except asyncio.TimeoutError:
+            return name, None, "超时"
+
+    async def _handle_all(self, event: AstrMessageEvent, page: str = "") -> tuple[bool, str | bytes]:
         data = self.datamanager.get_all_configs(event.get_group_id(), event.get_sender_id(), self.is_global)
+        if not data:
+            return False, "❌ 暂无已保存的服务器"
+
+        paged = self._paginate(data, page)
+        if paged is None:
+            return False, "❌ 页码无效，用法：/mcs all [页码]"
+        items, page_num, total_pages, _ = paged
+
+        batch_conf = self.config.get("batch", {})
+        semaphore = asyncio.Semaphore(max(batch_conf.get("concurrency", 8), 1))
+        timeout = batch_conf.get("timeout", 5)
+
+        # 并发探测，按完成顺序收集结果；单个服务器超时或离线不影响其他行
+        results: dict[str, tuple[dict | None, str]] = {}
+        probes = [self._probe_with_deadline(semaphore, name, addr, timeout) for name, addr in items]
+        for finished in asyncio.as_completed(probes):
+            name, status, error = await finished
+            results[name] = (status, error)
+
+        rows = []
+        checked_times = []
+        for name, addr in items:
+            status, error = results.get(name, (None, ""))
+            row = {"name": name, "addr": addr}
+            if status is not None:
+                row.update({
+                    "online": status.get("online"),
+                    "max": status.get("max"),
+                    "latency": int(round(status.get("latency", 0))),
+                    "version": status.get("version"),
+                })
+                checked_times.append(status.get("checked_at") or time.time())
+            else:
+                row["error"] = error or "离线"
+            rows.append(row)
+
         data_map = {
-            "servers": data
+            "rows": rows,
+            "total": len(data),
+            "page": page_num,
+            "total_pages": total_pages,
         }
-        return await self._generate_list_response(data_map)
-
-    async def _handle_help(self, event: AstrMessageEvent) -> tuple[bool, str]:
-        # 帮助列表：(指令, 描述)
-        help_items = [
-            ("help", "获取此帮助信息"),
-            ("motd <IP>", "获取服务器状态/延迟"),
-            ("players <IP>", "获取在线玩家列表(失效)"),
-            ("add <Name> <IP>", "添加常用服务器"),
-            ("del <Name>", "删除已存服务器"),
-            ("look <Name>", "查询已存服务器"),
-            ("list", "显示服务器列表"),
-            ("clear", "清空所有 (*仅管理)")
-        ]
+        if checked_times:
+            # 显示最早一条结果的探测时间
+            data_map["time"] = datetime.datetime.fromtimestamp(min(checked_times)).strftime("%Y/%m/%d %H:%M")
+        success, result = await self._render_image("dashboard", data_map)
+        if success:
+            return True, result
+        return False, f"❌ 总览生成失败: {result}"
+
+    async def _handle_trend(self, event: AstrMessageEvent, server_name: str, range_name: str = "") -> tuple[bool, str | bytes]:
+        if not server_name:
+            return False, "用法：/mcs trend <名称> [24h|7d]"
+        if self.history is None:
+            return False, "❌ 未开启历史记录"
+        range_name = (range_name or "24h").lower()
+        if range_name not in RANGES:
+            return False, f"❌ 时间范围无效，可选：{' / '.join(RANGES)}"
+        addr = self.datamanager.get_server_addr(server_name, event.get_group_id(), event.get_sender_id(), self.is_global)
+        if addr is None:
+            return False, f"❌ 未找到 {server_name}"
 
+        loop = asyncio.get_running_loop()
+        summary = await loop.run_in_executor(None, self.history.summarize, canonical_addr(addr), range_name, time.time())
+        if summary is None:
+            return False, f"❌ {server_name} 暂无历史记录，查询或轮询后才会开始记录"
+
+        range_labels = {"24h": "近 24 小时", "7d": "近 7 天", "30d": "近 30 天"}
+        data_map = dict(summary, name=server_name, addr=addr, range_label=range_labels.get(range_name, range_name))
+        success, result = await self._render_image("trend", data_map)
+        if success:
+            return True, result
+        return False, f"❌ 趋势图生成失败: {result}"
+
+    async def _handle_help(self, event: AstrMessageEvent) -> tuple[bool, str | bytes]:
         data_map = {
-            "help_items": help_items,
+            "help_items": HELP_ITEMS,
             "version": self.plugin_version,
-            "server_icon": None
+            "server_icon": None,
+            "show_time": False
         }
         return await self._generate_help_response(data_map)
 
@@ -223,6 +629,7 @@ class CommandFunc:
         if not server_name:
             return False, "用法：/mcs del [名称]"
         if self.datamanager.remove_server_addr(server_name, event.get_group_id(), event.get_sender_id(), self.is_global):
+            await self._prune_history()
             return False, f"✅ 服务器 {server_name} 删除成功！"
         else:
             return False, "❌ 未找到。"
@@ -231,12 +638,26 @@ class CommandFunc:
         if not server_name or not server_addr:
             return False, "用法：/mcs set [名] [地址]"
         if self.datamanager.update_server_addr(server_name, server_addr, event.get_group_id(), event.get_sender_id(), self.is_global):
+            await self._prune_history()
             return False, "✅ 更新成功。"
         return False, "❌ 更新失败。"
 
+    async def _handle_stats(self, event: AstrMessageEvent) -> tuple[bool, str]:
+        if event.get_sender_id() not in self.admin_list:
+            return False, "❌ 权限不足"
+        stats = self.datamanager.get_address_stats()
+        if not stats:
+            return False, "暂无已保存的服务器"
+        total = sum(stats.values())
+        top = sorted(stats.items(), key=lambda item: item[1], reverse=True)[:10]
+        lines = [f"📊 共 {total} 条记录，合并为 {len(stats)} 个服务器，后台探测与缓存按服务器共享"]
+        lines.extend(f"{i}. {addr} × {count}" for i, (addr, count) in enumerate(top, 1))
+        return False, "\n".join(lines)
+
     async def _handle_clear(self, event: AstrMessageEvent) -> tuple[bool, str]:
         if event.get_sender_id() not in self.admin_list:
             return False, "❌ 权限不足"
         if self.datamanager.clear_all_configs(event.get_group_id(), event.get_sender_id(), self.is_global):
+            await self._prune_history()
             return False, "✅ 已清空。"
         return False, "❌ 失败。"
@@ -1,20 +1,54 @@
+import asyncio
 import json
 import os
 import re
+import shutil
+import threading
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
 
 from astrbot.api import logger
 
 
+def canonical_addr(server_addr: str) -> str:
+    """
+    规范化服务器地址：去除空白、转为小写、去掉主机名末尾的点，仅用作缓存、统计与历史记录的键
+    显式写出的端口（包括 25565）会保留：带端口的地址直连，不带端口的地址先查 SRV，两者不能合并
+    """
+    addr = server_addr.strip().lower()
+    host, sep, port = addr.rpartition(":")
+    if not sep:
+        return addr.rstrip(".")
+    return f"{host.rstrip('.')}:{port}"
+
+
 class DataManager:
-    def __init__(self, config_dir: Path):
+    def __init__(self, config_dir: Path, save_delay: float = 1.0):
         self.config_dir = config_dir
         self.config_file = config_dir / "data.json"
         self.config_data = {}
+        # 各作用域的修改版本号，用于使列表图片缓存失效
+        self._revisions: dict[tuple, int] = {}
+        # 规范化地址 -> 引用它的 (作用域, 名称)，随增删改增量维护
+        self._addr_index: dict[str, set[tuple]] = {}
 
+        # 延迟写入：修改只标记为脏，save_delay 秒内的多次修改合并为一次后台写入
+        self.save_delay = max(save_delay, 0)
+        self._dirty = False
+        self._lock = threading.RLock()        # 保护 config_data，写盘线程序列化时持有
+        self._write_lock = threading.Lock()   # 保证同一时间只有一个写盘任务
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_future: asyncio.Future | None = None
 
     def load_config(self) -> bool:
         try:
+            migrated_file = self.config_file.with_name(self.config_file.name + ".migrated")
+            if not os.path.exists(self.config_file) and os.path.exists(migrated_file):
+                # 旧版迁移到 SQLite 时会把 data.json 重命名，切换回 json 存储时从该文件恢复
+                logger.warning(f"未找到 {self.config_file}，从 {migrated_file} 恢复（不含迁移后在数据库中的修改）")
+                shutil.copyfile(migrated_file, self.config_file)
+
             if not os.path.exists(self.config_file):
                 logger.info(f"配置文件 {self.config_file} 不存在，将创建新配置")
                 self.save_config()
@@ -29,6 +63,11 @@ class DataManager:
                     self.config_data["group_id"] = {}
                 if "user_id" not in self.config_data:
                     self.config_data["user_id"] = {}
+                removed = self._compact()
+                if removed:
+                    logger.info(f"已清理 {removed} 个空的群组/用户记录")
+                    self._mark_dirty()
+                self._rebuild_index()
                 return True
             else:
                 logger.error("配置文件格式错误，使用空配置")
@@ -47,19 +86,71 @@ class DataManager:
             return False
 
     def save_config(self) -> bool:
-        try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
+        """立即写盘"""
+        with self._lock:
+            self._dirty = True
+        return self.flush()
 
-            with open(self.config_file, "w", encoding="utf-8") as file:
-                json.dump(self.config_data, file, indent=2, ensure_ascii=False)
+    def flush(self) -> bool:
+        """有未保存的修改时写盘，可在线程池中调用"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                payload = json.dumps(self.config_data, ensure_ascii=False)
+                self._dirty = False
+            if self._write_atomic(payload):
+                return True
+            with self._lock:
+                self._dirty = True
+            return False
 
-            logger.info(f"配置已保存到 {self.config_file}")
+    def _write_atomic(self, payload: str) -> bool:
+        """先写入临时文件并 fsync，再原子替换，写到一半中断也不会损坏原文件"""
+        tmp_file = self.config_file.with_name(self.config_file.name + ".tmp")
+        try:
+            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as file:
+                file.write(payload)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_file, self.config_file)
+            logger.debug(f"配置已保存到 {self.config_file}")
             return True
 
         except Exception as e:
             logger.error(f"保存配置文件时发生错误: {e}")
             return False
 
+    def _mark_dirty(self):
+        """标记有未保存的修改并安排延迟写入；不在事件循环中时直接写盘"""
+        with self._lock:
+            self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.save_delay, self._start_flush, loop)
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop):
+        self._flush_handle = None
+        self._flush_future = loop.run_in_executor(None, self.flush)
+
+    async def close(self) -> bool:
+        """取消等待中的延迟写入，等待进行中的写盘完成后做最后一次写盘"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_future is not None:
+            try:
+                await self._flush_future
+            except Exception as e:
+                logger.error(f"后台保存配置失败: {e}")
+            self._flush_future = None
+        return self.flush()
+
     @staticmethod
     def check_server_addr(server_addr: str) -> bool:
         if not server_addr or len(server_addr) > 253:
@@ -67,73 +158,163 @@ class DataManager:
         pattern = r"^([a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*|((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?))(:[1-9][0-9]{0,4}|:[1-5][0-9]{4}|:6[0-4][0-9]{3}|:65[0-4][0-9]{2}|:655[0-2][0-9]|:6553[0-5])?$"
         return bool(re.match(pattern, server_addr))
 
-    def _get_target_dict(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> dict:
-        if "global" not in self.config_data:
-            self.config_data["global"] = {}
-        if "group_id" not in self.config_data:
-            self.config_data["group_id"] = {}
-        if "user_id" not in self.config_data:
-            self.config_data["user_id"] = {}
-
+    @staticmethod
+    def scope_key(group_id: str | None, user_id: str | None, is_global: bool = False) -> tuple:
         if is_global:
-            return self.config_data["global"]
-
+            return ("global",)
         if group_id:
-            if group_id not in self.config_data["group_id"]:
-                self.config_data["group_id"][group_id] = {}
-            return self.config_data["group_id"][group_id]
+            return ("group_id", group_id)
         elif user_id:
-            if user_id not in self.config_data["user_id"]:
-                self.config_data["user_id"][user_id] = {}
-            return self.config_data["user_id"][user_id]
-        return self.config_data["global"]
+            return ("user_id", user_id)
+        return ("global",)
+
+    def get_revision(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> int:
+        return self._revisions.get(self.scope_key(group_id, user_id, is_global), 0)
+
+    def _bump_revision(self, group_id: str | None, user_id: str | None, is_global: bool = False):
+        key = self.scope_key(group_id, user_id, is_global)
+        self._revisions[key] = self._revisions.get(key, 0) + 1
 
-    def get_all_configs(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> dict[str, str]:
-        target = self._get_target_dict(group_id, user_id, is_global)
-        return target.copy()
+    def _rebuild_index(self):
+        self._addr_index = {}
+        for name, addr in self.config_data.get("global", {}).items():
+            self._index_add(("global",), name, addr)
+        for scope_type in ("group_id", "user_id"):
+            for scope_id, servers in self.config_data.get(scope_type, {}).items():
+                for name, addr in servers.items():
+                    self._index_add((scope_type, scope_id), name, addr)
+
+    def _index_add(self, scope: tuple, name: str, addr: str):
+        key = canonical_addr(addr)
+        if key:
+            self._addr_index.setdefault(key, set()).add((scope, name))
+
+    def _index_remove(self, scope: tuple, name: str, addr: str):
+        key = canonical_addr(addr)
+        refs = self._addr_index.get(key)
+        if refs is None:
+            return
+        refs.discard((scope, name))
+        if not refs:
+            del self._addr_index[key]
+
+    def get_all_server_addrs(self) -> set[str]:
+        """全局、群组、用户各作用域中保存的所有不重复地址（规范化后）"""
+        return set(self._addr_index)
+
+    def has_server_addr(self, canonical: str) -> bool:
+        """规范化地址是否被任一作用域保存"""
+        return canonical in self._addr_index
+
+    def get_address_stats(self) -> dict[str, int]:
+        """每个规范化地址被多少条记录引用"""
+        return {addr: len(refs) for addr, refs in self._addr_index.items()}
+
+    def _compact(self) -> int:
+        """删除没有任何服务器的群组/用户记录，返回删除数量"""
+        removed = 0
+        with self._lock:
+            for scope_type in ("group_id", "user_id"):
+                scopes = self.config_data.get(scope_type, {})
+                # 重建字典而不是逐个删除，删除键不会收缩字典占用的内存
+                kept = {scope_id: servers for scope_id, servers in scopes.items() if servers}
+                removed += len(scopes) - len(kept)
+                self.config_data[scope_type] = kept
+        return removed
+
+    def _find_target(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> dict | None:
+        """只读查找作用域，不存在时返回 None，不会创建空记录"""
+        scope = self.scope_key(group_id, user_id, is_global)
+        if scope[0] == "global":
+            return self.config_data.get("global")
+        return self.config_data.get(scope[0], {}).get(scope[1])
+
+    def _get_target_dict(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> dict:
+        """取得作用域，不存在时创建，仅供写入使用"""
+        scope = self.scope_key(group_id, user_id, is_global)
+        with self._lock:
+            if scope[0] == "global":
+                return self.config_data.setdefault("global", {})
+            return self.config_data.setdefault(scope[0], {}).setdefault(scope[1], {})
+
+    def _drop_if_empty(self, group_id: str | None, user_id: str | None, is_global: bool = False):
+        """群组/用户作用域清空后删除该记录，调用方需持有锁"""
+        scope = self.scope_key(group_id, user_id, is_global)
+        if scope[0] == "global":
+            return
+        scopes = self.config_data.get(scope[0], {})
+        if scope[1] in scopes and not scopes[scope[1]]:
+            del scopes[scope[1]]
+
+    def get_all_configs(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> Mapping[str, str]:
+        """返回作用域的只读视图，不复制数据"""
+        target = self._find_target(group_id, user_id, is_global)
+        return MappingProxyType(target if target is not None else {})
 
     def get_server_addr(self, identifier: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> str | None:
-        target = self._get_target_dict(group_id, user_id, is_global)
-        return target.get(identifier)
+        target = self._find_target(group_id, user_id, is_global)
+        return target.get(identifier) if target is not None else None
 
     def add_server_addr(self, identifier: str, server_addr: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
         if not identifier or not server_addr:
             return False
         if not self.check_server_addr(server_addr):
             return False
-        target = self._get_target_dict(group_id, user_id, is_global)
-        target[identifier] = server_addr
-        self.save_config()
+        scope = self.scope_key(group_id, user_id, is_global)
+        with self._lock:
+            target = self._get_target_dict(group_id, user_id, is_global)
+            if identifier in target:
+                self._index_remove(scope, identifier, target[identifier])
+            target[identifier] = server_addr
+            self._index_add(scope, identifier, server_addr)
+        self._bump_revision(group_id, user_id, is_global)
+        self._mark_dirty()
         return True
 
     def update_server_addr(self, identifier: str, new_server_addr: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
-        target = self._get_target_dict(group_id, user_id, is_global)
-        if identifier not in target:
-            return False
         if not self.check_server_addr(new_server_addr):
             return False
-        target[identifier] = new_server_addr
-        self.save_config()
+        with self._lock:
+            target = self._find_target(group_id, user_id, is_global)
+            if target is None or identifier not in target:
+                return False
+            scope = self.scope_key(group_id, user_id, is_global)
+            self._index_remove(scope, identifier, target[identifier])
+            target[identifier] = new_server_addr
+            self._index_add(scope, identifier, new_server_addr)
+        self._bump_revision(group_id, user_id, is_global)
+        self._mark_dirty()
         return True
 
     def remove_server_addr(self, identifier: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
-        target = self._get_target_dict(group_id, user_id, is_global)
-        if identifier in target:
+        with self._lock:
+            target = self._find_target(group_id, user_id, is_global)
+            if target is None or identifier not in target:
+                return False
+            self._index_remove(self.scope_key(group_id, user_id, is_global), identifier, target[identifier])
             del target[identifier]
-            self.save_config()
-            return True
-        return False
+            self._drop_if_empty(group_id, user_id, is_global)
+        self._bump_revision(group_id, user_id, is_global)
+        self._mark_dirty()
+        return True
 
     def clear_all_configs(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
         try:
-            target = self._get_target_dict(group_id, user_id, is_global)
-            target.clear()
-            self.save_config()
+            with self._lock:
+                target = self._find_target(group_id, user_id, is_global)
+                if target is not None:
+                    scope = self.scope_key(group_id, user_id, is_global)
+                    for name, addr in target.items():
+                        self._index_remove(scope, name, addr)
+                    target.clear()
+                    self._drop_if_empty(group_id, user_id, is_global)
+            self._bump_revision(group_id, user_id, is_global)
+            self._mark_dirty()
             return True
         except Exception as e:
             logger.error(f"清除数据失败，错误原因：{e}")
             return False
 
     def has_identifier(self, identifier: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
-        target = self._get_target_dict(group_id, user_id, is_global)
-        return identifier in target
+        target = self._find_target(group_id, user_id, is_global)
+        return target is not None and identifier in target
@@ -1,28 +1,80 @@
-import asyncio
 import base64
 import datetime
+import hashlib
 import io
 import os
-import re
+import random
+import threading
+from collections import OrderedDict
 
 from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageOps
 
 from astrbot.api import logger
 
+from .cache import BytesLRUCache
+from .encoder import encode_image
+from .motd import MotdRun, layout_line, motd_cache_key, parse_motd
+from .text_layout import char_width, text_width, truncate_text, wrap_text
+
+
+def image_nbytes(img: Image.Image) -> int:
+    """未压缩画布占用的内存字节数"""
+    return img.width * img.height * len(img.getbands())
+
+
+# 底图缓存：(背景路径, mtime, W, H) -> 已绘制背景与卡片容器的画布，按条目数与总字节数限制
+_BASE_LAYER_CACHE = BytesLRUCache(max_entries=16, max_bytes=32 * 1024 * 1024, sizeof=image_nbytes)
+_BASE_LAYER_LOCK = threading.Lock()
+
+# 字体缓存：(字体路径, mtime, 字号) -> 字体对象
+_FONT_CACHE: OrderedDict[tuple, ImageFont.ImageFont | ImageFont.FreeTypeFont] = OrderedDict()
+_FONT_CACHE_SIZE = 64
+_FONT_LOCK = threading.Lock()
+
+# 服务器图标缓存：(图标哈希, 尺寸) -> 已裁成圆形的图标；圆形遮罩按尺寸缓存
+_ICON_CACHE: OrderedDict[tuple, Image.Image] = OrderedDict()
+_ICON_CACHE_SIZE = 128
+_MASK_CACHE: dict[int, Image.Image] = {}
+_ICON_LOCK = threading.Lock()
+
+# 卡片静态层缓存：(地址, MOTD, 图标哈希, 版本, 协议, 字体, 背景...) -> (画布, content_x, content_y)
+_CARD_STATIC_CACHE = BytesLRUCache(max_entries=32, max_bytes=24 * 1024 * 1024, sizeof=lambda item: image_nbytes(item[0]))
+_CARD_STATIC_LOCK = threading.Lock()
+
+# 卡片模板版本，布局变更时递增，使已缓存的成品图失效
+TEMPLATE_VERSION = 2
+
+# §k 随机字符使用的字形
+OBFUSCATED_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+# 列表画布高度按此步长向上取整，使不同数量的列表可以复用同一张底图
+LIST_HEIGHT_STEP = 100
 
 class Draw:
-    def __init__(self, output_path: str, bg_path: str):
-        self.output_path = output_path
+    def __init__(self, bg_path: str, output: dict | None = None, render_options: dict | None = None):
+        self.output = output or {}
+        render_options = render_options or {}
+        # 整体缩放比例与背景模糊的降采样倍数
+        self.scale = min(max(float(render_options.get("scale", 1.0)), 0.25), 2.0)
+        self.blur_downscale = max(int(render_options.get("blur_downscale", 4)), 1)
+        # 底图与卡片静态层缓存为进程内共享，进程池模式下每个渲染进程各占一份预算
+        if "base_layer_mb" in render_options:
+            with _BASE_LAYER_LOCK:
+                _BASE_LAYER_CACHE.max_bytes = max(int(render_options["base_layer_mb"] * 1024 * 1024), 0)
+                _BASE_LAYER_CACHE.trim()
+        if "card_static_mb" in render_options:
+            with _CARD_STATIC_LOCK:
+                _CARD_STATIC_CACHE.max_bytes = max(int(render_options["card_static_mb"] * 1024 * 1024), 0)
+                _CARD_STATIC_CACHE.trim()
         self.assets_dir = os.path.join(os.path.dirname(__file__), "..", "assets")
         self.user_bg_name = bg_path
         self.default_bg_path = os.path.join(self.assets_dir, "bg.jpg")
         self.default_icon_path = os.path.join(self.assets_dir, "default_icon.png")
 
-        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
-
         # 基础配置
-        self.CARD_WIDTH = 1200
-        self.CARD_HEIGHT = 580
+        self.CARD_WIDTH = self.px(1200)
+        self.CARD_HEIGHT = self.px(580)
 
         # MC 颜色代码映射
         self.MC_COLORS = {
@@ -44,20 +96,54 @@ class Draw:
             "progress_fill": (170, 230, 255), "progress_border": (200, 240, 255)
         }
 
-    def get_font(self, font_name: str, size: int) -> ImageFont.ImageFont | ImageFont.FreeTypeFont:
+    def px(self, value: float) -> int:
+        """按整体缩放比例换算像素值"""
+        return int(round(value * self.scale))
+
+    def _resolve_font_path(self, font_name: str) -> str | None:
         paths = [
             os.path.join(self.assets_dir, font_name),
             os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", font_name)
         ]
         for p in paths:
-            if os.path.exists(p):
-                try: return ImageFont.truetype(p, size)
-                except: pass
+            if os.path.isfile(p): return os.path.realpath(p)
+        return None
+
+    @staticmethod
+    def _load_font(font_path: str | None, size: int) -> ImageFont.ImageFont | ImageFont.FreeTypeFont:
+        if font_path:
+            try: return ImageFont.truetype(font_path, size)
+            except: pass
         try: return ImageFont.truetype("arial rounded mt bold.ttf", size)
         except:
             try: return ImageFont.truetype("arial.ttf", size)
             except: return ImageFont.load_default()
 
+    def get_font(self, font_name: str, size: int) -> ImageFont.ImageFont | ImageFont.FreeTypeFont:
+        """字体全进程共享，按 (路径, mtime, 字号) 只加载一次"""
+        size = max(self.px(size), 1)
+        font_path = self._resolve_font_path(font_name)
+        try: mtime = os.path.getmtime(font_path) if font_path else 0
+        except OSError: mtime = 0
+        key = (font_path, mtime, size)
+
+        with _FONT_LOCK:
+            font = _FONT_CACHE.get(key)
+            if font is not None:
+                _FONT_CACHE.move_to_end(key)
+                return font
+
+        font = self._load_font(font_path, size)
+
+        with _FONT_LOCK:
+            # 字体文件被替换后丢弃旧版本
+            for stale in [k for k in _FONT_CACHE if k[0] == font_path and k[1] != mtime]:
+                del _FONT_CACHE[stale]
+            _FONT_CACHE[key] = font
+            while len(_FONT_CACHE) > _FONT_CACHE_SIZE:
+                _FONT_CACHE.popitem(last=False)
+        return font
+
     def decode_icon(self, base64_str: str) -> Image.Image:
         try:
             if not base64_str: raise ValueError
@@ -70,48 +156,116 @@ class Draw:
             if os.path.exists(self.default_icon_path): return Image.open(self.default_icon_path).convert("RGBA")
             return Image.new("RGBA", (64, 64), (255, 230, 235))
 
-    def draw_colored_text(self, draw: ImageDraw.ImageDraw, xy: tuple[int, int], text: str, font: ImageFont.ImageFont | ImageFont.FreeTypeFont) -> int:
-        default_color = self.CUTE_THEME["text_main"]
+    @staticmethod
+    def _circle_mask(size: int) -> Image.Image:
+        """圆形遮罩，每个尺寸只生成一次"""
+        with _ICON_LOCK:
+            mask = _MASK_CACHE.get(size)
+            if mask is None:
+                mask = Image.new("L", (size, size), 0)
+                ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+                _MASK_CACHE[size] = mask
+            return mask
+
+    def get_round_icon(self, base64_str: str | None, size: int) -> Image.Image:
+        """解码、缩放并裁成圆形的服务器图标，按图标内容哈希缓存"""
+        digest = hashlib.sha1(base64_str.encode()).hexdigest() if base64_str else "default"
+        key = (digest, size)
+        with _ICON_LOCK:
+            icon = _ICON_CACHE.get(key)
+            if icon is not None:
+                _ICON_CACHE.move_to_end(key)
+                return icon
+
+        icon = self.decode_icon(base64_str)
+        icon = icon.resize((size, size), Image.Resampling.LANCZOS)
+        icon.putalpha(self._circle_mask(size))
+
+        with _ICON_LOCK:
+            _ICON_CACHE[key] = icon
+            while len(_ICON_CACHE) > _ICON_CACHE_SIZE:
+                _ICON_CACHE.popitem(last=False)
+        return icon
+
+    def _run_color(self, run: MotdRun) -> tuple[int, int, int]:
+        if run.color is None: return self.CUTE_THEME["text_main"]
+        if isinstance(run.color, tuple): return run.color
+        return self.MC_COLORS.get(run.color, self.CUTE_THEME["text_main"])
+
+    def draw_motd_line(self, canvas: Image.Image, draw: ImageDraw.ImageDraw, xy: tuple[int, int], line: tuple[MotdRun, ...], font: ImageFont.ImageFont | ImageFont.FreeTypeFont) -> int:
+        """按缓存的样式段绘制一行 MOTD，支持粗体/斜体/下划线/删除线/随机字符"""
         x_start, y_start = xy
         current_x = float(x_start)
-        parts = re.split(r"(§[0-9a-fk-or])", text)
-        current_color = default_color
-        for part in parts:
-            if part.startswith("§") and len(part) == 2:
-                code = part[1].lower()
-                if code in self.MC_COLORS: current_color = self.MC_COLORS[code]
-                if code == "r": current_color = default_color
-                continue
-            if part:
-                draw.text((current_x, y_start), part, font=font, fill=current_color)
-                if hasattr(draw, "textlength"): length = draw.textlength(part, font=font)
-                else:
-                    bbox = draw.textbbox((0, 0), part, font=font)
-                    length = bbox[2] - bbox[0]
-                current_x += length
+        ascent = font.getmetrics()[0] if hasattr(font, "getmetrics") else 10
+        for run, width in layout_line(line, font):
+            color = self._run_color(run)
+            if run.obfuscated:
+                # 随机字符：逐字替换为随机字形，占位宽度保持不变
+                char_x = current_x
+                for char in run.text:
+                    draw.text((char_x, y_start), random.choice(OBFUSCATED_CHARS), font=font, fill=color)
+                    char_x += char_width(font, char)
+            elif run.italic:
+                self._draw_italic(canvas, (current_x, y_start), run.text, font, color, run.bold)
+            else:
+                draw.text((current_x, y_start), run.text, font=font, fill=color)
+                if run.bold: draw.text((current_x + 1, y_start), run.text, font=font, fill=color)
+            if run.underlined:
+                line_y = y_start + ascent + self.px(2)
+                draw.line((current_x, line_y, current_x + width, line_y), fill=color, width=max(self.px(2), 1))
+            if run.strikethrough:
+                line_y = y_start + int(ascent * 0.6)
+                draw.line((current_x, line_y, current_x + width, line_y), fill=color, width=max(self.px(2), 1))
+            current_x += width
         return int(current_x)
 
+    @staticmethod
+    def _draw_italic(canvas: Image.Image, xy: tuple[float, int], text: str, font, color, bold: bool):
+        """先绘制到临时图层再做错切变换，模拟斜体"""
+        left, top, right, bottom = font.getbbox(text)
+        h = bottom + 4
+        slant = 0.2
+        pad = int(h * slant) + 2
+        layer = Image.new("RGBA", (int(right) + pad * 2, h), (0, 0, 0, 0))
+        layer_draw = ImageDraw.Draw(layer)
+        layer_draw.text((pad, 0), text, font=font, fill=color)
+        if bold: layer_draw.text((pad + 1, 0), text, font=font, fill=color)
+        layer = layer.transform(layer.size, Image.Transform.AFFINE, (1, slant, -slant * h / 2, 0, 1, 0), resample=Image.Resampling.BICUBIC)
+        x, y = int(xy[0]) - pad, int(xy[1])
+        canvas.alpha_composite(layer, (max(x, 0), y))
+
     def draw_cute_label(self, draw, x, y, text, font, bg_color, text_color=None):
         if text_color is None: text_color = self.CUTE_THEME["text_label"]
         bbox = draw.textbbox((x, y), text, font=font)
-        padding_x, padding_y = 12, 4
+        padding_x, padding_y = self.px(12), self.px(4)
         bg_box = (bbox[0] - padding_x, bbox[1] - padding_y, bbox[2] + padding_x, bbox[3] + padding_y)
-        draw.rounded_rectangle(bg_box, radius=15, fill=bg_color)
+        draw.rounded_rectangle(bg_box, radius=self.px(15), fill=bg_color)
         draw.text((x, y), text, font=font, fill=text_color)
         return bg_box[2]
 
-    async def _init_canvas_no_icon(self, W, H) -> tuple[Image.Image, ImageDraw.ImageDraw, int, int]:
-        loop = asyncio.get_event_loop()
+    def encode(self, img: Image.Image) -> bytes:
+        return encode_image(img, self.output)
 
-        # 背景
+    def _resolve_bg_path(self) -> str | None:
         bg_path = self.default_bg_path
         user_bg = os.path.join(self.assets_dir, self.user_bg_name)
         if os.path.exists(user_bg): bg_path = user_bg
+        if os.path.exists(bg_path): return bg_path
+        return None
 
-        if os.path.exists(bg_path):
-            bg = await loop.run_in_executor(None, Image.open, bg_path)
-            bg = ImageOps.fit(bg, (W, H), method=Image.Resampling.LANCZOS)
-            bg = bg.filter(ImageFilter.GaussianBlur(12))
+    def _build_base_layer(self, bg_path: str | None, W: int, H: int) -> Image.Image:
+        """绘制背景与卡片容器，结果只与背景文件和画布尺寸有关"""
+        # 背景
+        if bg_path:
+            # 模糊后的背景没有高频细节，先在低分辨率下模糊再放大回画布尺寸
+            factor = self.blur_downscale
+            small = (max(W // factor, 1), max(H // factor, 1))
+            with Image.open(bg_path) as src:
+                src.draft("RGB", small)
+                bg = ImageOps.fit(src, small, method=Image.Resampling.LANCZOS)
+            bg = bg.filter(ImageFilter.GaussianBlur(self.px(12) / factor))
+            if factor > 1:
+                bg = bg.resize((W, H), Image.Resampling.BICUBIC)
             bg = bg.convert("RGBA")
             white_overlay = Image.new("RGBA", (W, H), (255, 255, 255, 100))
             bg = Image.alpha_composite(bg, white_overlay)
@@ -122,82 +276,68 @@ class Draw:
         overlay = Image.new("RGBA", (W, H), (0,0,0,0))
         draw_overlay = ImageDraw.Draw(overlay)
 
-        margin = 35
+        margin = self.px(35)
         card_box = (margin, margin, W-margin, H-margin)
-        card_radius = 35
-        shadow_offset = 8
+        card_radius = self.px(35)
+        shadow_offset = self.px(8)
         draw_overlay.rounded_rectangle(
             (card_box[0]+shadow_offset, card_box[1]+shadow_offset, card_box[2]+shadow_offset, card_box[3]+shadow_offset),
             radius=card_radius, fill=self.CUTE_THEME["shadow"]
         )
         draw_overlay.rounded_rectangle(card_box, radius=card_radius, fill=self.CUTE_THEME["card_bg"])
-        draw_overlay.rounded_rectangle(card_box, radius=card_radius, outline=self.CUTE_THEME["card_border"], width=3)
+        draw_overlay.rounded_rectangle(card_box, radius=card_radius, outline=self.CUTE_THEME["card_border"], width=max(self.px(3), 1))
 
-        bg = Image.alpha_composite(bg, overlay)
-        draw = ImageDraw.Draw(bg)
+        return Image.alpha_composite(bg, overlay)
 
-        content_x = margin + 40
-        content_y = margin + 40
-        return bg, draw, content_x, content_y
+    def _get_base_layer(self, W: int, H: int) -> Image.Image:
+        """获取底图副本，同一 (背景, mtime, W, H, 模糊倍数) 只绘制一次"""
+        bg_path = self._resolve_bg_path()
+        mtime = os.path.getmtime(bg_path) if bg_path else 0
+        key = (bg_path, mtime, W, H, self.blur_downscale)
 
-    # 通用画布初始化
-    async def _init_canvas(self, W, H, icon_data) -> tuple[Image.Image, ImageDraw.ImageDraw, int, int]:
-        loop = asyncio.get_event_loop()
+        with _BASE_LAYER_LOCK:
+            cached = _BASE_LAYER_CACHE.get(key)
+            if cached is not None:
+                return cached.copy()
 
-        # 背景
-        bg_path = self.default_bg_path
-        user_bg = os.path.join(self.assets_dir, self.user_bg_name)
-        if os.path.exists(user_bg): bg_path = user_bg
+        base = self._build_base_layer(bg_path, W, H)
 
-        if os.path.exists(bg_path):
-            bg = await loop.run_in_executor(None, Image.open, bg_path)
-            bg = ImageOps.fit(bg, (W, H), method=Image.Resampling.LANCZOS)
-            bg = bg.filter(ImageFilter.GaussianBlur(12))
-            bg = bg.convert("RGBA")
-            white_overlay = Image.new("RGBA", (W, H), (255, 255, 255, 100))
-            bg = Image.alpha_composite(bg, white_overlay)
-        else:
-            bg = Image.new("RGBA", (W, H), self.CUTE_THEME["bg_fallback"])
+        with _BASE_LAYER_LOCK:
+            _BASE_LAYER_CACHE.set(key, base)
+        return base.copy()
 
-        # 卡片容器
-        overlay = Image.new("RGBA", (W, H), (0,0,0,0))
-        draw_overlay = ImageDraw.Draw(overlay)
+    def _init_canvas_no_icon(self, W, H) -> tuple[Image.Image, ImageDraw.ImageDraw, int, int]:
+        bg = self._get_base_layer(W, H)
+        draw = ImageDraw.Draw(bg)
 
-        margin = 35
-        card_box = (margin, margin, W-margin, H-margin)
-        card_radius = 35
-        shadow_offset = 8
-        draw_overlay.rounded_rectangle(
-            (card_box[0]+shadow_offset, card_box[1]+shadow_offset, card_box[2]+shadow_offset, card_box[3]+shadow_offset),
-            radius=card_radius, fill=self.CUTE_THEME["shadow"]
-        )
-        draw_overlay.rounded_rectangle(card_box, radius=card_radius, fill=self.CUTE_THEME["card_bg"])
-        draw_overlay.rounded_rectangle(card_box, radius=card_radius, outline=self.CUTE_THEME["card_border"], width=3)
+        margin = self.px(35)
+        content_x = margin + self.px(40)
+        content_y = margin + self.px(40)
+        return bg, draw, content_x, content_y
 
-        bg = Image.alpha_composite(bg, overlay)
+    # 通用画布初始化
+    def _init_canvas(self, W, H, icon_data) -> tuple[Image.Image, ImageDraw.ImageDraw, int, int]:
+        bg = self._get_base_layer(W, H)
         draw = ImageDraw.Draw(bg)
+        margin = self.px(35)
 
         # 图标
-        icon_size = 150
-        icon_x, icon_y = margin + 40, margin + 45
-        icon_img = self.decode_icon(icon_data)
-        icon_img = icon_img.resize((icon_size, icon_size), Image.Resampling.LANCZOS)
-        mask = Image.new("L", (icon_size, icon_size), 0)
-        ImageDraw.Draw(mask).ellipse((0, 0, icon_size, icon_size), fill=255)
-        ring_offset = 6
+        icon_size = self.px(150)
+        icon_x, icon_y = margin + self.px(40), margin + self.px(45)
+        icon_img = self.get_round_icon(icon_data, icon_size)
+        ring_offset = self.px(6)
         draw.ellipse(
             (icon_x - ring_offset, icon_y - ring_offset, icon_x + icon_size + ring_offset, icon_y + icon_size + ring_offset),
-            fill=self.CUTE_THEME["bg_fallback"], outline=self.CUTE_THEME["card_border"], width=3
+            fill=self.CUTE_THEME["bg_fallback"], outline=self.CUTE_THEME["card_border"], width=max(self.px(3), 1)
         )
-        bg.paste(icon_img, (icon_x, icon_y), mask)
+        bg.paste(icon_img, (icon_x, icon_y), icon_img)
 
-        content_x = icon_x + icon_size + 50
-        content_y = icon_y + 5
+        content_x = icon_x + icon_size + self.px(50)
+        content_y = icon_y + self.px(5)
         return bg, draw, content_x, content_y
 
-    async def draw_list(self, data_map: dict, seted_font_name: str) -> tuple[bool, str]:
+    def draw_list(self, data_map: dict, seted_font_name: str) -> tuple[bool, bytes | str]:
         try:
-            loop = asyncio.get_event_loop()
             W = self.CARD_WIDTH
 
             font_title = self.get_font(seted_font_name, 42)
@@ -208,43 +348,25 @@ class Draw:
             servers = data_map.get("servers", {})
 
             # 计算需要的高度
-            temp_img = Image.new("RGBA", (W, 100))
-            temp_draw = ImageDraw.Draw(temp_img)
-
-            margin = 35
-            content_x = margin + 40
-            max_text_w = W - margin * 2 - 80
+            margin = self.px(35)
+            content_x = margin + self.px(40)
+            max_text_w = W - margin * 2 - self.px(80)
 
-            y_offset = margin + 40
-            y_offset += 80 # 标题下方间距
+            y_offset = margin + self.px(40)
+            y_offset += self.px(80) # 标题下方间距
 
             server_lines = []
 
             if not servers:
-                y_offset += 60
+                y_offset += self.px(60)
             else:
-                for idx, (name, addr) in enumerate(servers.items(), 1):
+                start_index = data_map.get("start_index", 1)
+                for idx, (name, addr) in enumerate(servers.items(), start_index):
                     name_text = f"{idx}. {name}"
                     addr_text = f"地址: {addr}"
 
-                    # 换行处理
-                    def wrap_text(text, font, max_w):
-                        lines = []
-                        current_line = ""
-                        for char in text:
-                            test_line = current_line + char
-                            bbox = temp_draw.textbbox((0, 0), test_line, font=font)
-                            if bbox[2] - bbox[0] > max_w and current_line:
-                                lines.append(current_line)
-                                current_line = char
-                            else:
-                                current_line = test_line
-                        if current_line:
-                            lines.append(current_line)
-                        return lines
-
                     name_wrapped = wrap_text(name_text, font_item, max_text_w)
-                    addr_wrapped = wrap_text(addr_text, font_addr, max_text_w - 40)
+                    addr_wrapped = wrap_text(addr_text, font_addr, max_text_w - self.px(40))
 
                     server_lines.append({
                         "name_lines": name_wrapped,
@@ -252,21 +374,27 @@ class Draw:
                         "is_blue": (idx % 2 == 1)
                     })
 
-                    y_offset += len(name_wrapped) * 45 + len(addr_wrapped) * 35 + 25 # 每个服务器的间距
+                    y_offset += len(name_wrapped) * self.px(45) + len(addr_wrapped) * self.px(35) + self.px(25) # 每个服务器的间距
 
-            H = int(y_offset + 80) # 底部留白和footer
-            H = max(H, 300) # 最小高度
+            H = int(y_offset + self.px(80)) # 底部留白和footer
+            H = max(H, self.px(300)) # 最小高度
+            step = self.px(LIST_HEIGHT_STEP)
+            H = -(-H // step) * step # 按步长取整以命中底图缓存
 
-            bg, draw, content_x, content_y = await self._init_canvas_no_icon(W, H)
+            bg, draw, content_x, content_y = self._init_canvas_no_icon(W, H)
 
             # 绘制标题
             draw.text((content_x, content_y), "服务器列表", font=font_title, fill=self.CUTE_THEME["text_main"])
 
-            # 绘制小胶囊: 共 x 个
-            count_x = content_x + 240
-            self.draw_cute_label(draw, count_x, content_y + 10, f"共 {len(servers)} 个", font_addr, self.CUTE_THEME["pill_pink"], self.CUTE_THEME["pill_text_pink"])
+            # 绘制小胶囊: 共 x 个 (分页时附带页码)
+            count_x = content_x + self.px(240)
+            count_text = f"共 {data_map.get('total', len(servers))} 个"
+            total_pages = data_map.get("total_pages", 1)
+            if total_pages > 1:
+                count_text += f" · 第 {data_map.get('page', 1)}/{total_pages} 页"
+            self.draw_cute_label(draw, count_x, content_y + self.px(10), count_text, font_addr, self.CUTE_THEME["pill_pink"], self.CUTE_THEME["pill_text_pink"])
 
-            current_y = content_y + 80
+            current_y = content_y + self.px(80)
 
             if not servers:
                 draw.text((content_x, current_y), "暂无已保存的服务器", font=font_item, fill=self.CUTE_THEME["text_main"])
@@ -278,14 +406,14 @@ class Draw:
                     # 绘制名称
                     for line in srv["name_lines"]:
                         draw.text((content_x, current_y), line, font=font_item, fill=pill_text)
-                        current_y += 45
+                        current_y += self.px(45)
 
                     # 绘制地址
                     for line in srv["addr_lines"]:
-                        draw.text((content_x + 40, current_y), line, font=font_addr, fill=self.CUTE_THEME["text_label"])
-                        current_y += 35
+                        draw.text((content_x + self.px(40), current_y), line, font=font_addr, fill=self.CUTE_THEME["text_label"])
+                        current_y += self.px(35)
 
-                    current_y += 15 # 额外间距
+                    current_y += self.px(15) # 额外间距
 
             # 底部右下角信息
             current_time = datetime.datetime.now().strftime("%Y/%m/%d %H:%M")
@@ -295,15 +423,16 @@ class Draw:
             def draw_right_align(text, y, font, color):
                 bbox = draw.textbbox((0, 0), text, font=font)
                 w = bbox[2] - bbox[0]
-                x = W - margin - w - 10
+                x = W - margin - w - self.px(10)
                 draw.text((x, y), text, font=font, fill=color)
 
-            footer_base_y = H - margin - 60
-            draw_right_align(footer_text_1, footer_base_y, font_footer, self.CUTE_THEME["text_footer"])
-            draw_right_align(footer_text_2, footer_base_y + 25, font_footer, self.CUTE_THEME["text_footer"])
+            footer_base_y = H - margin - self.px(60)
+            # 静态页面不绘制查询时间
+            if data_map.get("show_time", True):
+                draw_right_align(footer_text_1, footer_base_y, font_footer, self.CUTE_THEME["text_footer"])
+            draw_right_align(footer_text_2, footer_base_y + self.px(25), font_footer, self.CUTE_THEME["text_footer"])
 
-            await loop.run_in_executor(None, bg.save, self.output_path)
-            return True, self.output_path
+            return True, self.encode(bg)
 
         except Exception as e:
             logger.error(f"服务器列表绘图失败: {e}")
@@ -311,15 +440,229 @@ class Draw:
             traceback.print_exc()
             return False, str(e)
 
+    # 批量状态总览：每个服务器一行
+    def draw_dashboard(self, data_map: dict, seted_font_name: str) -> tuple[bool, bytes | str]:
+        try:
+            W = self.CARD_WIDTH
+
+            font_title = self.get_font(seted_font_name, 42)
+            font_name = self.get_font(seted_font_name, 28)
+            font_small = self.get_font(seted_font_name, 22)
+            font_val = self.get_font(seted_font_name, 24)
+            font_footer = self.get_font(seted_font_name, 18)
+
+            rows = data_map.get("rows", [])
+            margin = self.px(35)
+            row_h = self.px(52)
+
+            H = margin + self.px(40) + self.px(80) + len(rows) * row_h + self.px(120)
+            H = max(H, self.px(300))
+            step = self.px(LIST_HEIGHT_STEP)
+            H = -(-H // step) * step # 按步长取整以命中底图缓存
+
+            bg, draw, content_x, content_y = self._init_canvas_no_icon(W, H)
+
+            draw.text((content_x, content_y), "服务器总览", font=font_title, fill=self.CUTE_THEME["text_main"])
+            up_count = sum(1 for row in rows if row.get("online") is not None)
+            count_text = f"在线 {up_count} / 共 {data_map.get('total', len(rows))} 个"
+            total_pages = data_map.get("total_pages", 1)
+            if total_pages > 1:
+                count_text += f" · 第 {data_map.get('page', 1)}/{total_pages} 页"
+            self.draw_cute_label(draw, content_x + self.px(240), content_y + self.px(10), count_text, font_small, self.CUTE_THEME["pill_pink"], self.CUTE_THEME["pill_text_pink"])
+
+            # 列位置：状态点、名称、地址、在线人数、延迟、版本
+            col_name = content_x + self.px(30)
+            col_addr = content_x + self.px(310)
+            col_players = content_x + self.px(620)
+            col_latency = content_x + self.px(750)
+            col_version = content_x + self.px(860)
+            col_end = W - margin - self.px(40)
+
+            current_y = content_y + self.px(80)
+            dot_r = self.px(9)
+            for row in rows:
+                is_up = row.get("online") is not None
+                dot_color = self.CUTE_THEME["ping_good"] if is_up else self.CUTE_THEME["ping_bad"]
+                dot_y = current_y + self.px(18)
+                draw.ellipse((content_x, dot_y - dot_r, content_x + dot_r * 2, dot_y + dot_r), fill=dot_color)
+
+                name = truncate_text(str(row.get("name", "")), font_name, col_addr - col_name - self.px(10))
+                draw.text((col_name, current_y), name, font=font_name, fill=self.CUTE_THEME["text_main"])
+                addr = truncate_text(str(row.get("addr", "")), font_small, col_players - col_addr - self.px(10))
+                draw.text((col_addr, current_y + self.px(5)), addr, font=font_small, fill=self.CUTE_THEME["text_label"])
+
+                if is_up:
+                    draw.text((col_players, current_y + self.px(3)), f"{row.get('online')}/{row.get('max')}", font=font_val, fill=self.CUTE_THEME["pill_text_blue"])
+                    latency = row.get("latency", 0)
+                    lat_color = self.CUTE_THEME["ping_good"] if latency < 100 else (self.CUTE_THEME["ping_mid"] if latency < 200 else self.CUTE_THEME["ping_bad"])
+                    draw.text((col_latency, current_y + self.px(3)), f"{latency}ms", font=font_val, fill=lat_color)
+                    version = truncate_text(str(row.get("version", "")), font_small, col_end - col_version)
+                    draw.text((col_version, current_y + self.px(5)), version, font=font_small, fill=self.CUTE_THEME["text_label"])
+                else:
+                    draw.text((col_players, current_y + self.px(3)), row.get("error", "离线"), font=font_val, fill=self.CUTE_THEME["pill_text_pink"])
+
+                current_y += row_h
+
+            # 底部右下角信息
+            current_time = data_map.get("time") or datetime.datetime.now().strftime("%Y/%m/%d %H:%M")
+            footer_text_1 = f"查询时间：{current_time}"
+            footer_text_2 = "astrbot_plugin_mcstatus | Design by 清蒸云鸭"
+
+            def draw_right_align(text, y, font, color):
+                bbox = draw.textbbox((0, 0), text, font=font)
+                w = bbox[2] - bbox[0]
+                x = W - margin - w - self.px(10)
+                draw.text((x, y), text, font=font, fill=color)
+
+            footer_base_y = H - margin - self.px(60)
+            draw_right_align(footer_text_1, footer_base_y, font_footer, self.CUTE_THEME["text_footer"])
+            draw_right_align(footer_text_2, footer_base_y + self.px(25), font_footer, self.CUTE_THEME["text_footer"])
+
+            return True, self.encode(bg)
+
+        except Exception as e:
+            logger.error(f"服务器总览绘图失败: {e}")
+            import traceback
+            traceback.print_exc()
+            return False, str(e)
+
+    def _draw_sparkline(self, draw: ImageDraw.ImageDraw, box: tuple[int, int, int, int], values: list[float | None],
+                        color: tuple, fill_color: tuple | None = None) -> float:
+        """在 box 内绘制折线，None 处断开；fill_color 不为空时填充折线下方区域，返回纵轴最大值"""
+        left, top, right, bottom = box
+        known = [v for v in values if v is not None]
+        peak = max(known) if known else 0
+        peak = peak if peak > 0 else 1
+        step = (right - left) / max(len(values) - 1, 1)
+        usable = bottom - top - self.px(10)
+
+        segments: list[list[tuple[float, float]]] = [[]]
+        for i, value in enumerate(values):
+            if value is None:
+                if segments[-1]:
+                    segments.append([])
+                continue
+            segments[-1].append((left + i * step, bottom - value / peak * usable))
+
+        line_width = max(self.px(3), 1)
+        for segment in segments:
+            if not segment:
+                continue
+            if fill_color is not None and len(segment) > 1:
+                draw.polygon(segment + [(segment[-1][0], bottom), (segment[0][0], bottom)], fill=fill_color)
+            if len(segment) > 1:
+                draw.line(segment, fill=color, width=line_width, joint="curve")
+            else:
+                x, y = segment[0]
+                draw.ellipse((x - line_width, y - line_width, x + line_width, y + line_width), fill=color)
+        return peak
+
+    def draw_trend(self, data_map: dict, seted_font_name: str) -> tuple[bool, bytes | str]:
+        try:
+            W = self.CARD_WIDTH
+            H = self.px(840)
+
+            font_title = self.get_font(seted_font_name, 42)
+            font_small = self.get_font(seted_font_name, 22)
+            font_axis = self.get_font(seted_font_name, 18)
+            font_footer = self.get_font(seted_font_name, 18)
+
+            bg, draw, content_x, content_y = self._init_canvas_no_icon(W, H)
+            margin = self.px(35)
+            chart_left = content_x
+            chart_right = W - margin - self.px(40)
+
+            title = truncate_text(str(data_map.get("name", "")), font_title, chart_right - chart_left - self.px(260))
+            draw.text((content_x, content_y), title, font=font_title, fill=self.CUTE_THEME["text_main"])
+            title_w = draw.textbbox((0, 0), title, font=font_title)[2]
+            self.draw_cute_label(draw, content_x + title_w + self.px(25), content_y + self.px(10), data_map.get("range_label", ""),
+                                 font_small, self.CUTE_THEME["pill_pink"], self.CUTE_THEME["pill_text_pink"])
+            draw.text((content_x, content_y + self.px(60)), str(data_map.get("addr", "")), font=font_small, fill=self.CUTE_THEME["text_label"])
+
+            # 统计胶囊：在线率、平均延迟、峰值人数
+            uptime = data_map.get("uptime") or 0
+            avg_latency = data_map.get("avg_latency")
+            stats = [
+                f"在线率 {uptime * 100:.1f}%",
+                f"平均延迟 {int(round(avg_latency))}ms" if avg_latency is not None else "平均延迟 --",
+                f"峰值在线 {int(round(data_map.get('peak_online') or 0))}",
+            ]
+            pill_x = content_x
+            for text in stats:
+                self.draw_cute_label(draw, pill_x, content_y + self.px(105), text, font_small, self.CUTE_THEME["pill_blue"], self.CUTE_THEME["pill_text_blue"])
+                pill_x += int(text_width(text, font_small)) + self.px(50)
+
+            points = data_map.get("points", [])
+            chart_h = self.px(170)
+            charts = [
+                ("延迟 (ms)", [p["latency"] if p else None for p in points], self.CUTE_THEME["accent"], None),
+                ("在线人数", [p["online"] if p else None for p in points], self.CUTE_THEME["pill_text_blue"], self.CUTE_THEME["progress_fill"]),
+            ]
+            chart_top = content_y + self.px(190)
+            for label, values, color, fill_color in charts:
+                box = (chart_left, chart_top, chart_right, chart_top + chart_h)
+                draw.rounded_rectangle(box, radius=self.px(12), fill=self.CUTE_THEME["progress_bg"], outline=self.CUTE_THEME["progress_border"], width=max(self.px(2), 1))
+
+                # 离线时段：按不在线比例在底部画出粉色柱
+                step = (chart_right - chart_left) / max(len(points), 1)
+                for i, point in enumerate(points):
+                    if point and point["uptime"] < 1:
+                        bar_h = (1 - point["uptime"]) * chart_h * 0.3
+                        x0 = chart_left + i * step
+                        draw.rectangle((x0, chart_top + chart_h - bar_h, x0 + max(step - 1, 1), chart_top + chart_h - 1), fill=self.CUTE_THEME["ping_bad"])
+
+                peak = self._draw_sparkline(draw, box, values, color, fill_color)
+                # 填充区域会盖住边框，重新描边
+                draw.rounded_rectangle(box, radius=self.px(12), outline=self.CUTE_THEME["progress_border"], width=max(self.px(2), 1))
+                draw.text((chart_left, chart_top - self.px(30)), label, font=font_small, fill=self.CUTE_THEME["text_label"])
+                peak_text = f"最高 {int(round(peak))}" if any(v is not None for v in values) else "暂无数据"
+                peak_w = draw.textbbox((0, 0), peak_text, font=font_axis)[2]
+                draw.text((chart_right - peak_w, chart_top - self.px(26)), peak_text, font=font_axis, fill=self.CUTE_THEME["text_footer"])
+                chart_top += chart_h + self.px(70)
+
+            # 时间轴起止
+            axis_y = chart_top - self.px(65)
+            start_text = datetime.datetime.fromtimestamp(data_map.get("start", 0)).strftime("%m/%d %H:%M")
+            end_text = datetime.datetime.fromtimestamp(data_map.get("end", 0)).strftime("%m/%d %H:%M")
+            draw.text((chart_left, axis_y), start_text, font=font_axis, fill=self.CUTE_THEME["text_footer"])
+            end_w = draw.textbbox((0, 0), end_text, font=font_axis)[2]
+            draw.text((chart_right - end_w, axis_y), end_text, font=font_axis, fill=self.CUTE_THEME["text_footer"])
+
+            # 底部右下角信息
+            current_time = data_map.get("time") or datetime.datetime.now().strftime("%Y/%m/%d %H:%M")
+            footer_text_1 = f"查询时间：{current_time}"
+            footer_text_2 = "astrbot_plugin_mcstatus | Design by 清蒸云鸭"
+
+            def draw_right_align(text, y, font, color):
+                bbox = draw.textbbox((0, 0), text, font=font)
+                w = bbox[2] - bbox[0]
+                x = W - margin - w - self.px(10)
+                draw.text((x, y), text, font=font, fill=color)
+
+            footer_base_y = H - margin - self.px(60)
+            draw_right_align(footer_text_1, footer_base_y, font_footer, self.CUTE_THEME["text_footer"])
+            draw_right_align(footer_text_2, footer_base_y + self.px(25), font_footer, self.CUTE_THEME["text_footer"])
+
+            return True, self.encode(bg)
+
+        except Exception as e:
+            logger.error(f"趋势图绘图失败: {e}")
+            import traceback
+            traceback.print_exc()
+            return False, str(e)
+
     # [大幅美化] 帮助菜单绘制逻辑
-    async def draw_help(self, data_map: dict, seted_font_name: str) -> tuple[bool, str]:
+    def draw_help(self, data_map: dict, seted_font_name: str) -> tuple[bool, bytes | str]:
         try:
-            loop = asyncio.get_event_loop()
             W = self.CARD_WIDTH
-            # [修改] 高度改为 800，紧凑且美观
-            H = 800
+            # [修改] 高度改为 800，紧凑且美观；超过 8 条指令时按行高加高
+            help_items = data_map.get("help_items", [])
+            line_height = self.px(65) # 行高
+            H = self.px(800) + max(len(help_items) - 8, 0) * line_height
+            step = self.px(LIST_HEIGHT_STEP)
+            H = -(-H // step) * step # 按步长取整以命中底图缓存
 
-            bg, draw, content_x, content_y = await self._init_canvas(W, H, data_map.get("server_icon", ""))
+            bg, draw, content_x, content_y = self._init_canvas(W, H, data_map.get("server_icon", ""))
 
             font_title = self.get_font(seted_font_name, 42)
             font_subtitle = self.get_font(seted_font_name, 26)
@@ -329,15 +672,13 @@ class Draw:
 
             # --- 标题区域 ---
             plugin_ver = data_map.get("version", "1.0.0")
-            draw.text((content_x, content_y + 10), "MCStatus 插件帮助", font=font_title, fill=self.CUTE_THEME["text_main"])
+            draw.text((content_x, content_y + self.px(10)), "MCStatus 插件帮助", font=font_title, fill=self.CUTE_THEME["text_main"])
             # 绘制版本号小胶囊
-            ver_x = content_x + 360
-            self.draw_cute_label(draw, ver_x+15, content_y + 20, f"Ver {plugin_ver}", font_subtitle, self.CUTE_THEME["pill_pink"], self.CUTE_THEME["pill_text_pink"])
+            ver_x = content_x + self.px(360)
+            self.draw_cute_label(draw, ver_x + self.px(15), content_y + self.px(20), f"Ver {plugin_ver}", font_subtitle, self.CUTE_THEME["pill_pink"], self.CUTE_THEME["pill_text_pink"])
 
             # --- 列表区域 ---
-            help_items = data_map.get("help_items", [])
-            start_y = content_y + 90
-            line_height = 65 # 行高
+            start_y = content_y + self.px(90)
 
             for i, item in enumerate(help_items):
                 cmd_str, desc_str = item
@@ -351,26 +692,26 @@ class Draw:
                 # 计算指令文本宽度以调整胶囊大小，但给一个最小宽度保持整齐
                 cmd_bbox = draw.textbbox((0, 0), cmd_str, font=font_cmd)
                 cmd_w = cmd_bbox[2] - cmd_bbox[0]
-                pill_w = max(cmd_w + 40, 180) # 最小宽度180
+                pill_w = max(cmd_w + self.px(40), self.px(180)) # 最小宽度180
 
-                pill_box = (content_x, start_y, content_x + pill_w, start_y + 45)
-                draw.rounded_rectangle(pill_box, radius=22, fill=pill_bg)
+                pill_box = (content_x, start_y, content_x + pill_w, start_y + self.px(45))
+                draw.rounded_rectangle(pill_box, radius=self.px(22), fill=pill_bg)
 
                 # 居中绘制指令文字
                 text_x = content_x + (pill_w - cmd_w) / 2
-                draw.text((text_x, start_y + 6), cmd_str, font=font_cmd, fill=pill_text)
+                draw.text((text_x, start_y + self.px(6)), cmd_str, font=font_cmd, fill=pill_text)
 
                 # 绘制描述文字 (右侧)
-                draw.text((content_x + pill_w + 20, start_y + 8), f"→ {desc_str}", font=font_desc, fill=self.CUTE_THEME["text_main"])
+                draw.text((content_x + pill_w + self.px(20), start_y + self.px(8)), f"→ {desc_str}", font=font_desc, fill=self.CUTE_THEME["text_main"])
 
                 start_y += line_height
 
             # --- 底部提示 ---
-            tip_y = start_y + 10
+            tip_y = start_y + self.px(10)
             draw.text((content_x, tip_y), "Tip: 地址支持域名或IP:端口 (如 example.com:25566)", font=font_subtitle, fill=self.CUTE_THEME["text_label"])
 
             # --- 底部右下角信息 (严格对齐修复) ---
-            margin = 35
+            margin = self.px(35)
             current_time = datetime.datetime.now().strftime("%Y/%m/%d %H:%M")
             footer_text_1 = f"查询时间：{current_time}"
             footer_text_2 = "astrbot_plugin_mcstatus | Design by 清蒸云鸭"
@@ -380,16 +721,17 @@ class Draw:
                 bbox = draw.textbbox((0, 0), text, font=font)
                 w = bbox[2] - bbox[0]
                 # x = 画布宽度 - 边距 - 文字宽度 - 额外的一点padding(确保不贴边)
-                x = W - margin - w - 10
+                x = W - margin - w - self.px(10)
                 draw.text((x, y), text, font=font, fill=color)
 
             # 定位到底部
-            footer_base_y = H - margin - 60
-            draw_right_align(footer_text_1, footer_base_y, font_footer, self.CUTE_THEME["text_footer"])
-            draw_right_align(footer_text_2, footer_base_y + 25, font_footer, self.CUTE_THEME["text_footer"])
+            footer_base_y = H - margin - self.px(60)
+            # 静态页面不绘制查询时间
+            if data_map.get("show_time", True):
+                draw_right_align(footer_text_1, footer_base_y, font_footer, self.CUTE_THEME["text_footer"])
+            draw_right_align(footer_text_2, footer_base_y + self.px(25), font_footer, self.CUTE_THEME["text_footer"])
 
-            await loop.run_in_executor(None, bg.save, self.output_path)
-            return True, self.output_path
+            return True, self.encode(bg)
         except Exception as e:
             logger.error(f"帮助图片生成失败: {e}")
             import traceback
@@ -397,79 +739,137 @@ class Draw:
             return False, str(e)
 
     # 服务器状态卡片 (保持之前逻辑不变，仅复用 _init_canvas)
-    async def draw_card(self, data_map: dict, seted_font_name: str) -> tuple[bool, str]:
+    def _card_static_key(self, data_map: dict, seted_font_name: str) -> tuple:
+        icon = data_map.get("server_icon") or ""
+        bg_path = self._resolve_bg_path()
+        mtime = os.path.getmtime(bg_path) if bg_path else 0
+        return (
+            str(data_map.get("addr", "Unknown")),
+            motd_cache_key(data_map.get("motd_raw", "Unknown Server")),
+            hashlib.sha1(icon.encode()).hexdigest(),
+            str(data_map.get("version", "Unknown")),
+            str(data_map.get("protocol", "?")),
+            seted_font_name, bg_path, mtime, self.scale, self.blur_downscale,
+        )
+
+    def _get_card_static(self, data_map: dict, seted_font_name: str) -> tuple[Image.Image, int, int]:
+        """获取卡片静态层副本，同一服务器的图标、MOTD、地址、版本不变时只绘制一次"""
+        key = self._card_static_key(data_map, seted_font_name)
+        with _CARD_STATIC_LOCK:
+            cached = _CARD_STATIC_CACHE.get(key)
+            if cached is not None:
+                img, content_x, content_y = cached
+                return img.copy(), content_x, content_y
+
+        img, content_x, content_y = self._draw_card_static(data_map, seted_font_name)
+
+        with _CARD_STATIC_LOCK:
+            _CARD_STATIC_CACHE.set(key, (img, content_x, content_y))
+        return img.copy(), content_x, content_y
+
+    # 卡片静态层：背景、图标、MOTD、地址/版本/协议、各标签与进度条底槽
+    def _draw_card_static(self, data_map: dict, seted_font_name: str) -> tuple[Image.Image, int, int]:
+        W, H = self.CARD_WIDTH, self.CARD_HEIGHT
+
+        bg, draw, content_x, content_y = self._init_canvas(W, H, data_map.get("server_icon", ""))
+
+        font_title = self.get_font(seted_font_name, 42)
+        font_motd2 = self.get_font(seted_font_name, 28)
+        font_label = self.get_font(seted_font_name, 24)
+        font_val = self.get_font(seted_font_name, 28)
+        font_footer = self.get_font(seted_font_name, 18)
+
+        motd_raw = data_map.get("motd_raw", "Unknown Server")
+        motd_lines = parse_motd(motd_raw)
+        self.draw_motd_line(bg, draw, (content_x, content_y), motd_lines[0], font_title)
+        if len(motd_lines) > 1:
+            self.draw_motd_line(bg, draw, (content_x, content_y + self.px(55)), motd_lines[1], font_motd2)
+
+        grid_y = content_y + self.px(120)
+        col_gap = self.px(240)
+
+        def draw_field(x, y, label_text, value_text=None, label_pill_color=None, value_color=None, max_width=0):
+            bg_col = label_pill_color if label_pill_color else self.CUTE_THEME["pill_pink"]
+            self.draw_cute_label(draw, x, y, label_text, font_label, bg_col)
+            # 动态字段的值在动态层绘制
+            if value_text is None: return
+            val_str = str(value_text)
+            fill_col = value_color if value_color else self.CUTE_THEME["text_main"]
+            start_y = y + self.px(38)
+            if max_width > 0 and text_width(val_str, font_val) > max_width:
+                bbox = font_val.getbbox("Ay")
+                line_height = (bbox[3] - bbox[0]) + self.px(5)
+                for chunk in wrap_text(val_str, font_val, max_width):
+                    draw.text((x + self.px(5), start_y), chunk, font=font_val, fill=fill_col)
+                    start_y += line_height
+            else:
+                draw.text((x + self.px(5), start_y), val_str, font=font_val, fill=fill_col)
+
+        draw_field(content_x, grid_y, "地址", data_map.get("addr", "Unknown"), max_width=col_gap - self.px(30))
+        draw_field(content_x + col_gap, grid_y, "版本", data_map.get("version", "Unknown"),
+                   label_pill_color=self.CUTE_THEME["pill_blue"],
+                   value_color=self.CUTE_THEME["pill_text_blue"])
+        draw_field(content_x + col_gap*2, grid_y, "协议", data_map.get("protocol", "?"))
+        draw_field(content_x + col_gap*3, grid_y, "延迟")
+
+        list_y = grid_y + self.px(130)
+        self.draw_cute_label(draw, content_x, list_y, "在线列表", font_label, self.CUTE_THEME["pill_blue"], self.CUTE_THEME["pill_text_blue"])
+
+        margin = self.px(35)
+        bar_h = self.px(20)
+        bar_y = H - margin - self.px(90)
+        bar_x = margin + self.px(40)
+        bar_w = W - (margin * 2) - self.px(80)
+        draw.rounded_rectangle((bar_x, bar_y, bar_x + bar_w, bar_y + bar_h),
+                               radius=bar_h / 2, fill=self.CUTE_THEME["progress_bg"], outline=self.CUTE_THEME["progress_border"], width=max(self.px(2), 1))
+
+        footer_text_2 = "astrbot_plugin_mcstatus | Design by 清蒸云鸭"
+        bbox = draw.textbbox((0, 0), footer_text_2, font=font_footer)
+        draw.text((W - margin - (bbox[2] - bbox[0]) - self.px(10), bar_y + self.px(35 + 22)), footer_text_2, font=font_footer, fill=self.CUTE_THEME["text_footer"])
+
+        return bg, content_x, content_y
+
+    # 服务器状态卡片：复用静态层，只绘制延迟、玩家、在线人数、进度条与查询时间
+    def draw_card(self, data_map: dict, seted_font_name: str) -> tuple[bool, bytes | str]:
         try:
-            loop = asyncio.get_event_loop()
             W, H = self.CARD_WIDTH, self.CARD_HEIGHT
 
-            bg, draw, content_x, content_y = await self._init_canvas(W, H, data_map.get("server_icon", ""))
+            bg, content_x, content_y = self._get_card_static(data_map, seted_font_name)
+            draw = ImageDraw.Draw(bg)
 
-            font_title = self.get_font(seted_font_name, 42)
-            font_motd2 = self.get_font(seted_font_name, 28)
-            font_label = self.get_font(seted_font_name, 24)
             font_val = self.get_font(seted_font_name, 28)
             font_small = self.get_font(seted_font_name, 22)
             font_footer = self.get_font(seted_font_name, 18)
 
-            motd_raw = data_map.get("motd_raw", "Unknown Server")
-            motd_lines = motd_raw.split("\n")
-            self.draw_colored_text(draw, (content_x, content_y), motd_lines[0], font_title)
-            if len(motd_lines) > 1:
-                self.draw_colored_text(draw, (content_x, content_y + 55), motd_lines[1], font_motd2)
-
-            grid_y = content_y + 120
-            col_gap = 240
-
-            def draw_field(x, y, label_text, value_text, label_pill_color=None, value_color=None, max_len=0):
-                bg_col = label_pill_color if label_pill_color else self.CUTE_THEME["pill_pink"]
-                self.draw_cute_label(draw, x, y, label_text, font_label, bg_col)
-                val_str = str(value_text)
-                fill_col = value_color if value_color else self.CUTE_THEME["text_main"]
-                start_y = y + 38
-                if max_len > 0 and len(val_str) > max_len:
-                    bbox = font_val.getbbox("Ay")
-                    line_height = (bbox[3] - bbox[0]) + 5
-                    for i in range(0, len(val_str), max_len):
-                        chunk = val_str[i:i + max_len]
-                        draw.text((x + 5, start_y), chunk, font=font_val, fill=fill_col)
-                        start_y += line_height
-                else:
-                    draw.text((x + 5, start_y), val_str, font=font_val, fill=fill_col)
+            grid_y = content_y + self.px(120)
+            col_gap = self.px(240)
 
-            draw_field(content_x, grid_y, "地址", data_map.get("addr", "Unknown"), max_len=10)
-            draw_field(content_x + col_gap, grid_y, "版本", data_map.get("version", "Unknown"),
-                       label_pill_color=self.CUTE_THEME["pill_blue"],
-                       value_color=self.CUTE_THEME["pill_text_blue"])
-            draw_field(content_x + col_gap*2, grid_y, "协议", data_map.get("protocol", "?"))
             latency = data_map.get("latency", 0)
             lat_color = self.CUTE_THEME["ping_good"] if latency < 100 else (self.CUTE_THEME["ping_mid"] if latency < 200 else self.CUTE_THEME["ping_bad"])
-            draw_field(content_x + col_gap*3, grid_y, "延迟", f"{latency}ms", value_color=lat_color)
+            draw.text((content_x + col_gap*3 + self.px(5), grid_y + self.px(38)), f"{latency}ms", font=font_val, fill=lat_color)
 
-            list_y = grid_y + 130
+            list_y = grid_y + self.px(130)
             players = data_map.get("players", [])
-            self.draw_cute_label(draw, content_x, list_y, "在线列表", font_label, self.CUTE_THEME["pill_blue"], self.CUTE_THEME["pill_text_blue"])
             display_limit = 4
             if not players: player_str = "当前没有可爱的玩家在线哦~"
             else:
                 player_str = ", ".join(players[:display_limit])
                 if len(players) > display_limit: player_str += f" 等 {len(players)} 人"
-            draw.text((content_x + 5, list_y + 40), player_str, font=font_small, fill=self.CUTE_THEME["text_main"])
+            draw.text((content_x + self.px(5), list_y + self.px(40)), player_str, font=font_small, fill=self.CUTE_THEME["text_main"])
 
-            margin = 35
-            bar_h = 20
-            bar_y = H - margin - 90
-            bar_x = margin + 40
-            bar_w = W - (margin * 2) - 80
+            margin = self.px(35)
+            bar_h = self.px(20)
+            bar_y = H - margin - self.px(90)
+            bar_x = margin + self.px(40)
+            bar_w = W - (margin * 2) - self.px(80)
 
             online = data_map.get("online", 0)
             max_p = data_map.get("max", 1)
             if max_p == 0: max_p = 1
             ratio = min(online / max_p, 1.0)
 
-            draw.text((bar_x + 5, bar_y - 38), f"在线人数: {online} / {max_p}", font=font_val, fill=self.CUTE_THEME["text_main"])
+            draw.text((bar_x + self.px(5), bar_y - self.px(38)), f"在线人数: {online} / {max_p}", font=font_val, fill=self.CUTE_THEME["text_main"])
             bar_radius = bar_h / 2
-            draw.rounded_rectangle((bar_x, bar_y, bar_x + bar_w, bar_y + bar_h),
-                                   radius=bar_radius, fill=self.CUTE_THEME["progress_bg"], outline=self.CUTE_THEME["progress_border"], width=2)
             if ratio > 0:
                 fill_w = int(bar_w * ratio)
                 fill_w = max(fill_w, bar_h)
@@ -477,24 +877,33 @@ class Draw:
                                        radius=bar_radius, fill=self.CUTE_THEME["progress_fill"])
 
             # 底部信息
-            def draw_right_align(text, y, font, color):
-                bbox = draw.textbbox((0, 0), text, font=font)
-                w = bbox[2] - bbox[0]
-                x = W - margin - w - 10
-                draw.text((x, y), text, font=font, fill=color)
-
-            current_time = datetime.datetime.now().strftime("%Y/%m/%d %H:%M")
+            current_time = data_map.get("time") or datetime.datetime.now().strftime("%Y/%m/%d %H:%M")
             footer_text_1 = f"查询时间：{current_time}"
-            footer_text_2 = "astrbot_plugin_mcstatus | Design by 清蒸云鸭"
-            footer_base_y = bar_y + 35
-            draw_right_align(footer_text_1, footer_base_y, font_footer, self.CUTE_THEME["text_footer"])
-            draw_right_align(footer_text_2, footer_base_y + 22, font_footer, self.CUTE_THEME["text_footer"])
+            bbox = draw.textbbox((0, 0), footer_text_1, font=font_footer)
+            draw.text((W - margin - (bbox[2] - bbox[0]) - self.px(10), bar_y + self.px(35)), footer_text_1, font=font_footer, fill=self.CUTE_THEME["text_footer"])
 
-            await loop.run_in_executor(None, bg.save, self.output_path)
-            return True, self.output_path
+            return True, self.encode(bg)
 
         except Exception as e:
             logger.error(f"绘图失败: {e}")
             import traceback
             traceback.print_exc()
             return False, str(e)
+
+def render_job(kind: str, data_map: dict, font_name: str, bg_name: str,
+               output: dict | None = None, render_options: dict | None = None) -> tuple[bool, bytes | str]:
+    """
+    渲染任务入口，参数与返回值均可序列化，可直接提交到线程池或进程池
+    """
+    drawer = Draw(bg_path=bg_name, output=output, render_options=render_options)
+    renderers = {
+        "card": drawer.draw_card,
+        "help": drawer.draw_help,
+        "list": drawer.draw_list,
+        "dashboard": drawer.draw_dashboard,
+        "trend": drawer.draw_trend,
+    }
+    renderer = renderers.get(kind)
+    if renderer is None:
+        return False, f"未知的渲染类型: {kind}"
+    return renderer(data_map, font_name)
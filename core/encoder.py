@@ -0,0 +1,102 @@
+import io
+
+from PIL import Image
+
+from astrbot.api import logger
+
+# 输出格式 -> 文件扩展名
+OUTPUT_EXTENSIONS = {
+    "png": "png",
+    "png_palette": "png",
+    "jpeg": "jpg",
+    "webp": "webp",
+}
+
+# 超出大小预算时的最低画质与最小缩放比例
+MIN_QUALITY = 30
+MIN_SCALE = 0.5
+SCALE_STEP = 0.85
+
+
+def get_extension(options: dict | None) -> str:
+    return OUTPUT_EXTENSIONS.get((options or {}).get("format", "png"), "png")
+
+
+def _save(img: Image.Image, fmt: str, quality: int, compress_level: int,
+          palette_method: Image.Quantize = Image.Quantize.MEDIANCUT) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "jpeg":
+        img.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+    elif fmt == "webp":
+        img.save(buffer, format="WEBP", quality=quality, method=4)
+    elif fmt == "png_palette":
+        # 卡片颜色数有限，调色板量化后体积通常只有 RGBA 的几分之一
+        img.convert("RGB").quantize(colors=256, method=palette_method).save(
+            buffer, format="PNG", optimize=False, compress_level=compress_level
+        )
+    else:
+        img.save(buffer, format="PNG", compress_level=compress_level)
+    return buffer.getvalue()
+
+
+def _fit_quality(img: Image.Image, fmt: str, quality: int, compress_level: int, max_bytes: int) -> bytes:
+    """二分查找不超过大小预算的最高画质，找不到时返回最低画质的结果"""
+    data = _save(img, fmt, quality, compress_level)
+    if len(data) <= max_bytes or quality <= MIN_QUALITY:
+        return data
+
+    low, high = MIN_QUALITY, quality - 1
+    best = None
+    while low <= high:
+        mid = (low + high) // 2
+        candidate = _save(img, fmt, mid, compress_level)
+        if len(candidate) <= max_bytes:
+            best = candidate
+            low = mid + 1
+        else:
+            data = candidate
+            high = mid - 1
+    return best if best is not None else data
+
+
+def encode_image(img: Image.Image, options: dict | None = None) -> bytes:
+    """
+    按输出设置编码图片
+    options: format(png/png_palette/jpeg/webp)、quality、png_compress_level、max_kb(0 为不限制)
+    超出 max_kb 时依次尝试降低画质、调色板量化（PNG）、缩小尺寸；max_kb 为尽力而为，缩到最小仍超出时记录警告并返回最小的结果
+    """
+    options = options or {}
+    fmt = options.get("format", "png")
+    if fmt not in OUTPUT_EXTENSIONS:
+        fmt = "png"
+    quality = min(max(int(options.get("quality", 85)), 1), 100)
+    compress_level = min(max(int(options.get("png_compress_level", 6)), 0), 9)
+    max_bytes = max(int(options.get("max_kb", 0)), 0) * 1024
+
+    if not max_bytes:
+        return _save(img, fmt, quality, compress_level)
+
+    lossy = fmt in ("jpeg", "webp")
+    palette_method = Image.Quantize.MEDIANCUT
+    scale = 1.0
+    current = img
+    while True:
+        if lossy:
+            data = _fit_quality(current, fmt, quality, compress_level, max_bytes)
+        else:
+            data = _save(current, fmt, quality, compress_level, palette_method)
+            if len(data) > max_bytes and fmt == "png":
+                # 为满足预算改用调色板时，用更快、体积更小的八叉树量化；之后缩小尺寸不再先尝试 RGBA
+                fmt, palette_method = "png_palette", Image.Quantize.FASTOCTREE
+                data = _save(current, fmt, quality, compress_level, palette_method)
+        if len(data) <= max_bytes:
+            return data
+        if scale <= MIN_SCALE:
+            logger.warning(f"图片缩小到 {current.width}x{current.height} 后仍有 {len(data) // 1024}KB，"
+                           f"超出 max_kb={max_bytes // 1024}，按当前结果输出")
+            return data
+
+        # 体积大致与面积成正比，按比例估算下一次的缩放，至少缩小一档
+        scale = max(scale * min(SCALE_STEP, (max_bytes / len(data)) ** 0.5 * 0.95), MIN_SCALE)
+        size = (max(int(img.width * scale), 1), max(int(img.height * scale), 1))
+        current = img.resize(size, Image.Resampling.LANCZOS)
@@ -0,0 +1,246 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from astrbot.api import logger
+
+# 文件头：魔数 + 格式版本
+HEADER = struct.Struct("<4sI")
+MAGIC = b"MCSH"
+FORMAT_VERSION = 1
+
+# 降采样档位：(名称, 时间桶秒数, 槽位数)，按时间桶直接寻址的环形区
+TIERS = (
+    ("minute", 60, 1440),   # 最近 24 小时
+    ("hour", 3600, 720),    # 最近 30 天
+    ("day", 86400, 365),    # 最近 1 年
+)
+
+# 按列存储，每列 4 字节：时间桶起点、平均延迟、平均在线人数、最大人数、在线次数、采样次数
+COLUMNS = (("ts", "I"), ("latency", "f"), ("online", "f"), ("max", "I"), ("up", "I"), ("count", "I"))
+CELL_SIZE = 4
+
+# 查询范围 -> (档位, 时间跨度, 图表点数)
+RANGES = {
+    "24h": ("minute", 86400, 96),
+    "7d": ("hour", 7 * 86400, 84),
+    "30d": ("day", 30 * 86400, 30),
+}
+
+
+def _tier_layout() -> tuple[dict[str, tuple[int, int, int]], int]:
+    """各档位的 (起始偏移, 时间桶秒数, 槽位数) 与文件总大小"""
+    layout = {}
+    offset = HEADER.size
+    for name, step, capacity in TIERS:
+        layout[name] = (offset, step, capacity)
+        offset += capacity * CELL_SIZE * len(COLUMNS)
+    return layout, offset
+
+
+TIER_LAYOUT, FILE_SIZE = _tier_layout()
+
+
+class HistoryStore:
+    """
+    每个地址一个定长文件，按 (档位, 列, 槽位) 直接寻址
+    追加一条采样只改写各档位当前时间桶的一个槽位，复杂度 O(1)；文件大小固定，运行多久都不会增长
+    只记录已保存的地址，不再保存的地址由 prune 删除，目录总大小随已保存的服务器数量而定
+    """
+
+    def __init__(self, history_dir: str, max_open: int = 64):
+        self.history_dir = history_dir
+        self.max_open = max(int(max_open), 1)
+        # 已映射的文件：地址 -> (文件对象, mmap)
+        self._open: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = False
+        os.makedirs(self.history_dir, exist_ok=True)
+
+    def _path(self, addr: str) -> str:
+        return os.path.join(self.history_dir, hashlib.sha1(addr.encode("utf-8")).hexdigest()[:20] + ".bin")
+
+    def _map(self, addr: str, create: bool) -> mmap.mmap | None:
+        """取得地址对应文件的 mmap，调用方需持有锁；关闭后返回 None，不再重新打开文件"""
+        if self._closed:
+            return None
+        entry = self._open.get(addr)
+        if entry is not None:
+            self._open.move_to_end(addr)
+            return entry[1]
+
+        path = self._path(addr)
+        if not os.path.exists(path):
+            if not create:
+                return None
+            with open(path, "wb") as file:
+                file.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+                file.truncate(FILE_SIZE)
+
+        file = open(path, "r+b")
+        try:
+            if os.fstat(file.fileno()).st_size != FILE_SIZE:
+                file.truncate(FILE_SIZE)
+            mapped = mmap.mmap(file.fileno(), FILE_SIZE)
+        except Exception:
+            file.close()
+            raise
+        magic, version = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            # 格式不符时清空重建
+            logger.warning(f"历史记录文件格式不符，已重置: {path}")
+            mapped[:] = bytes(FILE_SIZE)
+            HEADER.pack_into(mapped, 0, MAGIC, FORMAT_VERSION)
+
+        self._open[addr] = (file, mapped)
+        while len(self._open) > self.max_open:
+            _, (old_file, old_map) = self._open.popitem(last=False)
+            old_map.close()
+            old_file.close()
+        return mapped
+
+    def append(self, addr: str, timestamp: float, status: dict | None):
+        """记录一次探测结果，status 为 None 表示离线"""
+        ts = int(timestamp)
+        up = status is not None
+        latency = float(status.get("latency") or 0) if up else 0.0
+        online = float(status.get("online") or 0) if up else 0.0
+        max_players = int(status.get("max") or 0) if up else 0
+
+        with self._lock:
+            mapped = self._map(addr, create=True)
+            if mapped is None:
+                return
+            for tier, step, capacity in TIERS:
+                bucket = ts - ts % step
+                slot = (ts // step) % capacity
+                offset = TIER_LAYOUT[tier][0]
+                cell = {name: offset + (i * capacity + slot) * CELL_SIZE for i, (name, _) in enumerate(COLUMNS)}
+                stored_ts = struct.unpack_from("<I", mapped, cell["ts"])[0]
+
+                if stored_ts == bucket:
+                    count = struct.unpack_from("<I", mapped, cell["count"])[0] + 1
+                    up_count = struct.unpack_from("<I", mapped, cell["up"])[0]
+                    if up:
+                        # 延迟与人数只对在线的采样求平均
+                        avg_latency = struct.unpack_from("<f", mapped, cell["latency"])[0]
+                        avg_online = struct.unpack_from("<f", mapped, cell["online"])[0]
+                        up_count += 1
+                        struct.pack_into("<f", mapped, cell["latency"], avg_latency + (latency - avg_latency) / up_count)
+                        struct.pack_into("<f", mapped, cell["online"], avg_online + (online - avg_online) / up_count)
+                        struct.pack_into("<I", mapped, cell["max"], max_players)
+                else:
+                    # 槽位中是一个周期前的旧数据，直接覆盖
+                    count, up_count = 1, int(up)
+                    struct.pack_into("<I", mapped, cell["ts"], bucket)
+                    struct.pack_into("<f", mapped, cell["latency"], latency)
+                    struct.pack_into("<f", mapped, cell["online"], online)
+                    struct.pack_into("<I", mapped, cell["max"], max_players)
+                struct.pack_into("<I", mapped, cell["up"], up_count)
+                struct.pack_into("<I", mapped, cell["count"], count)
+
+    def _read_columns(self, addr: str, tier: str) -> dict[str, array] | None:
+        """整列读取一个档位，每列一次性解码为数组"""
+        offset, _, capacity = TIER_LAYOUT[tier]
+        column_size = capacity * CELL_SIZE
+        with self._lock:
+            mapped = self._map(addr, create=False)
+            if mapped is None:
+                return None
+            columns = {}
+            for i, (name, typecode) in enumerate(COLUMNS):
+                start = offset + i * column_size
+                values = array(typecode)
+                values.frombytes(mapped[start:start + column_size])
+                if sys.byteorder == "big":
+                    values.byteswap()
+                columns[name] = values
+        return columns
+
+    def summarize(self, addr: str, range_name: str, now: float) -> dict | None:
+        """
+        按查询范围把档位数据聚合为定长的图表点
+        返回 points（每点为 None 或 latency/online/uptime）及整体统计；没有历史时返回 None
+        """
+        tier, span, point_count = RANGES[range_name]
+        columns = self._read_columns(addr, tier)
+        if columns is None:
+            return None
+
+        end = int(now)
+        start = end - span
+        width = span / point_count
+        latency_sum = [0.0] * point_count
+        online_sum = [0.0] * point_count
+        up_sum = [0] * point_count
+        count_sum = [0] * point_count
+        peak_online = 0.0
+        for ts, latency, online, up, count in zip(columns["ts"], columns["latency"], columns["online"],
+                                                  columns["up"], columns["count"]):
+            if not count or ts < start or ts > end:
+                continue
+            index = min(int((ts - start) / width), point_count - 1)
+            latency_sum[index] += latency * up
+            online_sum[index] += online * up
+            up_sum[index] += up
+            count_sum[index] += count
+            if up and online > peak_online:
+                peak_online = online
+
+        total_count = sum(count_sum)
+        if not total_count:
+            return None
+        total_up = sum(up_sum)
+        points = []
+        for i in range(point_count):
+            if not count_sum[i]:
+                points.append(None)
+                continue
+            up = up_sum[i]
+            points.append({
+                "latency": latency_sum[i] / up if up else None,
+                "online": online_sum[i] / up if up else None,
+                "uptime": up / count_sum[i],
+            })
+        return {
+            "points": points,
+            "start": start,
+            "end": end,
+            "uptime": total_up / total_count,
+            "avg_latency": sum(latency_sum) / total_up if total_up else None,
+            "peak_online": peak_online,
+        }
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """删除不在 keep 中的地址的历史文件，返回删除数量"""
+        keep = set(keep)
+        keep_names = {os.path.basename(self._path(addr)) for addr in keep}
+        removed = 0
+        with self._lock:
+            for addr in [addr for addr in self._open if addr not in keep]:
+                file, mapped = self._open.pop(addr)
+                mapped.close()
+                file.close()
+            for entry in os.scandir(self.history_dir):
+                if entry.name.endswith(".bin") and entry.name not in keep_names:
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                    except OSError as e:
+                        logger.warning(f"删除历史记录文件失败: {e}")
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for file, mapped in self._open.values():
+                mapped.flush()
+                mapped.close()
+                file.close()
+            self._open.clear()
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from astrbot.api import logger
+
+IMAGE_PREFIX = "mcstatus_"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".webp")
+
+
+class ImageRotation:
+    """
+    已生成图片的滚动索引：启动时从磁盘载入一次，之后只在内存中按生成顺序淘汰最旧的图片
+    """
+
+    def __init__(self, images_dir: str, max_count: int, max_bytes: int = 0):
+        self.images_dir = images_dir
+        self.max_count = max(int(max_count), 1)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.total_bytes = 0
+        self._files: deque[tuple[str, int]] = deque()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.images_dir, exist_ok=True)
+        self._seed()
+
+    def _seed(self):
+        """载入目录中已有的图片，按修改时间从旧到新排列，并按当前限制清理"""
+        existing = []
+        with os.scandir(self.images_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.startswith(IMAGE_PREFIX) and entry.name.endswith(IMAGE_EXTENSIONS):
+                    stat = entry.stat()
+                    existing.append((stat.st_mtime, entry.path, stat.st_size))
+        existing.sort()
+
+        with self._lock:
+            for _, path, size in existing:
+                self._files.append((path, size))
+                self.total_bytes += size
+            self._evict()
+
+    def new_path(self, ext: str = "png") -> str:
+        new_filename = f"{IMAGE_PREFIX}{int(time.time())}_{uuid.uuid4().hex[:8]}.{ext}"
+        return os.path.join(self.images_dir, new_filename)
+
+    def add(self, path: str, size: int):
+        """登记新生成的图片，超出数量或大小限制时删除最旧的图片"""
+        with self._lock:
+            self._files.append((path, size))
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        # 至少保留最新的一张
+        while len(self._files) > 1 and (
+            len(self._files) > self.max_count or (self.max_bytes and self.total_bytes > self.max_bytes)
+        ):
+            path, size = self._files.popleft()
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"清理缓存图片失败: {e}")
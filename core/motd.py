@@ -0,0 +1,166 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from PIL import ImageFont
+
+from .text_layout import char_width
+
+# 颜色/格式代码，如 §a、§l、§r
+MOTD_CODE_PATTERN = re.compile(r"§([0-9a-fk-or])", re.IGNORECASE)
+
+# JSON 文本组件中的颜色名 -> 颜色代码
+NAMED_COLORS = {
+    "black": "0", "dark_blue": "1", "dark_green": "2", "dark_aqua": "3",
+    "dark_red": "4", "dark_purple": "5", "gold": "6", "gray": "7",
+    "dark_gray": "8", "blue": "9", "green": "a", "aqua": "b",
+    "red": "c", "light_purple": "d", "yellow": "e", "white": "f",
+}
+
+# 格式代码 -> 样式字段
+FORMAT_CODES = {"k": "obfuscated", "l": "bold", "m": "strikethrough", "n": "underlined", "o": "italic"}
+
+
+class MotdRun(NamedTuple):
+    """一段样式相同的 MOTD 文本；color 为颜色代码、RGB 元组，None 表示默认颜色"""
+    text: str
+    color: str | tuple[int, int, int] | None = None
+    bold: bool = False
+    italic: bool = False
+    underlined: bool = False
+    strikethrough: bool = False
+    obfuscated: bool = False
+
+
+_PARSE_CACHE: OrderedDict[str, tuple[tuple[MotdRun, ...], ...]] = OrderedDict()
+_LAYOUT_CACHE: OrderedDict[tuple, tuple[tuple[MotdRun, float], ...]] = OrderedDict()
+_CACHE_SIZE = 256
+_LOCK = threading.Lock()
+
+
+def _cache_get(cache: OrderedDict, key):
+    with _LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_set(cache: OrderedDict, key, value):
+    with _LOCK:
+        cache[key] = value
+        while len(cache) > _CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _parse_legacy(text: str, base: MotdRun, lines: list[list[MotdRun]]):
+    """解析带 § 代码的文本，追加到 lines；base 为起始样式"""
+    style = base
+    for i, part in enumerate(MOTD_CODE_PATTERN.split(text)):
+        # split 结果中奇数位为代码，偶数位为文本
+        if i % 2 == 1:
+            code = part.lower()
+            if code == "r":
+                style = MotdRun("")
+            elif code in FORMAT_CODES:
+                style = style._replace(**{FORMAT_CODES[code]: True})
+            else:
+                # 颜色代码会清除之前的格式
+                style = MotdRun("", color=code)
+            continue
+        for j, segment in enumerate(part.split("\n")):
+            if j > 0:
+                lines.append([])
+            if segment:
+                lines[-1].append(style._replace(text=segment))
+
+
+def _parse_color(value) -> str | tuple[int, int, int] | None:
+    if not isinstance(value, str):
+        return None
+    if value in NAMED_COLORS:
+        return NAMED_COLORS[value]
+    if value.startswith("#") and len(value) == 7:
+        try:
+            return tuple(int(value[k:k + 2], 16) for k in (1, 3, 5))
+        except ValueError:
+            return None
+    return None
+
+
+def _parse_component(component, base: MotdRun, lines: list[list[MotdRun]]):
+    """递归解析 JSON 文本组件，子组件继承父组件样式"""
+    if isinstance(component, str):
+        _parse_legacy(component, base, lines)
+        return
+    if isinstance(component, (int, float)):
+        # 组件数组中允许出现数字与布尔值，按文本处理
+        _parse_legacy(str(component).lower() if isinstance(component, bool) else str(component), base, lines)
+        return
+    if isinstance(component, list):
+        for child in component:
+            _parse_component(child, base, lines)
+        return
+    if not isinstance(component, dict):
+        return
+
+    style = base
+    color = _parse_color(component.get("color"))
+    if color is not None:
+        style = style._replace(color=color)
+    for field in FORMAT_CODES.values():
+        if field in component:
+            style = style._replace(**{field: bool(component[field])})
+
+    text = component.get("text", component.get("translate", ""))
+    if text:
+        _parse_legacy(str(text), style, lines)
+    for child in component.get("extra", []):
+        _parse_component(child, style, lines)
+
+
+def motd_cache_key(motd) -> str:
+    if isinstance(motd, str):
+        return motd
+    # 加前缀区分文本组件与内容相同的字符串 MOTD
+    return "\0json:" + json.dumps(motd, sort_keys=True, ensure_ascii=False)
+
+
+def parse_motd(motd) -> tuple[tuple[MotdRun, ...], ...]:
+    """
+    将 MOTD 解析为按行分组的样式段，结果按 MOTD 内容缓存
+    字典与列表按 JSON 文本组件解析；字符串一律视为 § 代码文本，即使内容形如 JSON（如 "[2024]"）
+    """
+    key = motd_cache_key(motd)
+    cached = _cache_get(_PARSE_CACHE, key)
+    if cached is not None:
+        return cached
+
+    lines: list[list[MotdRun]] = [[]]
+    _parse_component(motd, MotdRun(""), lines)
+    result = tuple(tuple(line) for line in lines)
+    _cache_set(_PARSE_CACHE, key, result)
+    return result
+
+
+def layout_line(line: tuple[MotdRun, ...], font: ImageFont.ImageFont | ImageFont.FreeTypeFont) -> tuple[tuple[MotdRun, float], ...]:
+    """测量一行中每段文本的宽度，按 (行内容, 字体) 缓存"""
+    key = (line, getattr(font, "path", None) or id(font), getattr(font, "size", 0))
+    cached = _cache_get(_LAYOUT_CACHE, key)
+    if cached is not None:
+        return cached
+
+    result = []
+    for run in line:
+        if run.obfuscated:
+            width = sum(char_width(font, char) for char in run.text)
+        else:
+            width = font.getlength(run.text)
+        if run.bold:
+            width += 1
+        result.append((run, width))
+    result = tuple(result)
+    _cache_set(_LAYOUT_CACHE, key, result)
+    return result
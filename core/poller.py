@@ -0,0 +1,83 @@
+import asyncio
+import random
+from collections.abc import Awaitable, Callable, Iterable
+
+from astrbot.api import logger
+
+
+class StatusPoller:
+    """
+    后台定时探测所有已保存的服务器，使状态缓存保持新鲜
+    每轮间隔 interval 秒并附加 0~jitter 秒的随机抖动，同时探测的数量不超过 concurrency
+    """
+
+    def __init__(self,
+                 get_addresses: Callable[[], Iterable[str]],
+                 refresh: Callable[[str], Awaitable],
+                 interval: float = 60,
+                 jitter: float = 10,
+                 concurrency: int = 4,
+                 timeout: float = 10):
+        self.get_addresses = get_addresses
+        self.refresh = refresh
+        self.interval = max(interval, 1)
+        self.jitter = max(jitter, 0)
+        self.concurrency = max(int(concurrency), 1)
+        self.timeout = timeout
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> bool:
+        if self.running:
+            return True
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        except RuntimeError:
+            logger.warning("当前没有运行中的事件循环，后台轮询未启动")
+            return False
+        return True
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        # 首轮也加入随机延迟，避免插件重载后立刻集中探测
+        await asyncio.sleep(random.uniform(0, self.jitter))
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"后台轮询服务器状态失败: {e}")
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+
+    async def poll_once(self) -> int:
+        """探测一轮，返回探测的地址数量"""
+        addresses = list(self.get_addresses())
+        if not addresses:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def probe(addr: str):
+            await semaphore.acquire()
+            task = asyncio.ensure_future(self.refresh(addr))
+            # 超时后探测仍在进行，结束后才释放槽位，保证同时打开的连接不超过 concurrency
+            task.add_done_callback(lambda _: semaphore.release())
+            try:
+                await asyncio.wait_for(asyncio.shield(task), self.timeout)
+            except asyncio.TimeoutError:
+                logger.debug(f"后台轮询 {addr} 超时")
+
+        await asyncio.gather(*(probe(addr) for addr in addresses), return_exceptions=True)
+        return len(addresses)
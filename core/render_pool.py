@@ -0,0 +1,50 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from astrbot.api import logger
+
+from .draw import render_job
+
+
+class RenderPool:
+    """
+    绘图任务执行池，整个渲染过程在线程池/进程池中完成，不占用事件循环
+    """
+
+    def __init__(self, executor: str = "thread", workers: int = 2, max_queue: int = 8):
+        self.workers = max(int(workers), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self._pending = 0
+        self._executor = self._create_executor(executor)
+
+    def _create_executor(self, executor: str) -> Executor:
+        if executor == "process":
+            try:
+                return ProcessPoolExecutor(max_workers=self.workers)
+            except Exception as e:
+                logger.warning(f"创建渲染进程池失败，改用线程池: {e}")
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mcstatus_render")
+
+    @property
+    def is_full(self) -> bool:
+        # 正在执行 + 排队等待的任务数达到上限
+        return self._pending >= self.workers + self.max_queue
+
+    async def render(self, kind: str, data_map: dict, font_name: str, bg_name: str,
+                     output: dict | None = None, render_options: dict | None = None) -> tuple[bool, bytes | str]:
+        if self.is_full:
+            return False, "渲染任务繁忙，请稍后再试"
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, render_job,
+                                              kind, data_map, font_name, bg_name, output, render_options)
+        except Exception as e:
+            logger.error(f"渲染任务执行失败: {e}")
+            return False, str(e)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
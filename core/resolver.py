@@ -0,0 +1,98 @@
+import asyncio
+import ipaddress
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from astrbot.api import logger
+
+DEFAULT_PORT = 25565
+SRV_PREFIX = "_minecraft._tcp."
+
+# 查询函数：SRV 域名 -> (目标主机, 端口, TTL 秒)；记录不存在时返回 None，其他错误抛出异常
+SrvQuery = Callable[[str], Awaitable[tuple[str, int, float] | None]]
+
+
+async def dns_srv_query(name: str) -> tuple[str, int, float] | None:
+    """使用 dnspython 查询 SRV 记录（mcstatus 已依赖 dnspython）"""
+    import dns.asyncresolver
+    import dns.resolver
+
+    try:
+        answer = await dns.asyncresolver.resolve(name, "SRV")
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        return None
+    # 取优先级最高（数值最小）、权重最大的记录
+    record = min(answer, key=lambda r: (r.priority, -r.weight))
+    return str(record.target).rstrip("."), int(record.port), answer.rrset.ttl
+
+
+class SrvResolver:
+    """
+    缓存 _minecraft._tcp SRV 解析结果，按记录 TTL 过期（限制在 min_ttl~max_ttl 之间）
+    记录不存在时缓存 negative_ttl 秒；解析出错时不缓存，直接使用默认端口
+    query 可替换为测试用的假解析函数
+    """
+
+    def __init__(self, query: SrvQuery | None = None, min_ttl: float = 30, max_ttl: float = 3600,
+                 negative_ttl: float = 300, max_size: int = 1024):
+        self.query = query or dns_srv_query
+        self.min_ttl = max(min_ttl, 0)
+        self.max_ttl = max(max_ttl, self.min_ttl)
+        self.negative_ttl = max(negative_ttl, 0)
+        self.max_size = max(int(max_size), 1)
+        self._data: OrderedDict[str, tuple[float, tuple[str, int]]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def resolve(self, host: str) -> tuple[str, int]:
+        """解析未带端口的主机名，返回实际连接的 (主机, 端口)"""
+        host = host.lower().rstrip(".")
+        try:
+            ipaddress.ip_address(host)
+            # IP 地址没有 SRV 记录
+            return host, DEFAULT_PORT
+        except ValueError:
+            pass
+
+        item = self._data.get(host)
+        if item is not None:
+            expires_at, target = item
+            if expires_at >= time.monotonic():
+                self._data.move_to_end(host)
+                return target
+            del self._data[host]
+
+        task = self._inflight.get(host)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(host))
+            self._inflight[host] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, host: str) -> tuple[str, int]:
+        try:
+            try:
+                record = await self.query(SRV_PREFIX + host)
+            except Exception as e:
+                logger.debug(f"SRV 解析 {host} 失败，使用默认端口: {e}")
+                return host, DEFAULT_PORT
+
+            if record is None:
+                target, ttl = (host, DEFAULT_PORT), self.negative_ttl
+            else:
+                srv_host, srv_port, record_ttl = record
+                target, ttl = (srv_host, srv_port), min(max(record_ttl, self.min_ttl), self.max_ttl)
+            self._set(host, target, ttl)
+            return target
+        finally:
+            self._inflight.pop(host, None)
+
+    def _set(self, host: str, target: tuple[str, int], ttl: float):
+        if ttl <= 0:
+            return
+        self._data[host] = (time.monotonic() + ttl, target)
+        self._data.move_to_end(host)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
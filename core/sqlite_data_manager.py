@@ -0,0 +1,191 @@
+import json
+import os
+import sqlite3
+from collections.abc import Mapping
+from pathlib import Path
+
+from astrbot.api import logger
+
+from .data_manager import DataManager, canonical_addr
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS servers (
+    scope_type TEXT NOT NULL,
+    scope_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    addr TEXT NOT NULL,
+    canonical TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_servers_scope_name ON servers (scope_type, scope_id, name);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# canonical 列在旧版数据库中不存在，补齐后再建立索引
+CANONICAL_INDEX = "CREATE INDEX IF NOT EXISTS idx_servers_canonical ON servers (canonical)"
+
+
+class SqliteDataManager(DataManager):
+    """
+    SQLite 存储：按 (scope_type, scope_id, name) 建立索引，启动时不载入全部数据，每次修改只写一行
+    首次启动且数据库为空时，自动从 data.json 导入一次；data.json 保留不动，切换回 json 存储时仍可使用
+    """
+
+    def __init__(self, config_dir: Path):
+        super().__init__(config_dir=config_dir)
+        self.db_file = config_dir / "data.db"
+        self._conn: sqlite3.Connection | None = None
+
+    @staticmethod
+    def _scope(group_id: str | None, user_id: str | None, is_global: bool = False) -> tuple[str, str]:
+        key = DataManager.scope_key(group_id, user_id, is_global)
+        return key[0], key[1] if len(key) > 1 else ""
+
+    def load_config(self) -> bool:
+        try:
+            os.makedirs(self.config_dir, exist_ok=True)
+            # isolation_level=None：每条语句自动提交，单行修改即一次小事务
+            self._conn = sqlite3.connect(self.db_file, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._ensure_canonical_column()
+
+            # 只导入一次：之后即使在数据库中清空了数据，也不会再次从 data.json 恢复
+            migrated = self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from_json'").fetchone() is not None
+            is_empty = self._conn.execute("SELECT 1 FROM servers LIMIT 1").fetchone() is None
+            if not migrated and is_empty and os.path.exists(self.config_file):
+                self.migrate_from_json(self.config_file)
+            return True
+        except Exception as e:
+            logger.error(f"打开数据库时发生错误: {e}")
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            return False
+
+    def _ensure_canonical_column(self):
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(servers)")}
+        if "canonical" not in columns:
+            self._conn.execute("ALTER TABLE servers ADD COLUMN canonical TEXT")
+        # 补齐缺失值，并修正按旧规则生成的规范化地址
+        rows = [(canonical_addr(addr), rowid)
+                for rowid, addr, canonical in self._conn.execute("SELECT rowid, addr, canonical FROM servers")
+                if canonical != canonical_addr(addr)]
+        if rows:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("UPDATE servers SET canonical = ? WHERE rowid = ?", rows)
+        self._conn.execute(CANONICAL_INDEX)
+
+    def migrate_from_json(self, json_file: Path) -> int:
+        """把 data.json 中的数据导入数据库并记录已导入，原文件保留不动，返回导入条数"""
+        with open(json_file, encoding="utf-8") as file:
+            loaded_data = json.load(file)
+        if not isinstance(loaded_data, dict):
+            logger.error("data.json 格式错误，跳过导入")
+            return 0
+
+        rows = [("global", "", name, addr, canonical_addr(addr)) for name, addr in loaded_data.get("global", {}).items()]
+        for scope_type in ("group_id", "user_id"):
+            for scope_id, servers in loaded_data.get(scope_type, {}).items():
+                rows.extend((scope_type, scope_id, name, addr, canonical_addr(addr)) for name, addr in servers.items())
+
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO servers (scope_type, scope_id, name, addr, canonical) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)", (str(json_file),))
+        logger.info(f"已从 {json_file} 导入 {len(rows)} 条服务器数据，原文件保留；之后的修改只写入数据库")
+        return len(rows)
+
+    def save_config(self) -> bool:
+        # 每次修改已自动提交
+        return True
+
+    def flush(self) -> bool:
+        return True
+
+    async def close(self) -> bool:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        return True
+
+    def get_all_server_addrs(self) -> set[str]:
+        rows = self._conn.execute("SELECT DISTINCT canonical FROM servers").fetchall()
+        return {addr for (addr,) in rows if addr}
+
+    def has_server_addr(self, canonical: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM servers WHERE canonical = ? LIMIT 1", (canonical,)).fetchone() is not None
+
+    def get_address_stats(self) -> dict[str, int]:
+        return dict(self._conn.execute("SELECT canonical, COUNT(*) FROM servers GROUP BY canonical").fetchall())
+
+    def get_all_configs(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> Mapping[str, str]:
+        rows = self._conn.execute(
+            "SELECT name, addr FROM servers WHERE scope_type = ? AND scope_id = ? ORDER BY rowid",
+            self._scope(group_id, user_id, is_global),
+        ).fetchall()
+        return dict(rows)
+
+    def get_server_addr(self, identifier: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> str | None:
+        row = self._conn.execute(
+            "SELECT addr FROM servers WHERE scope_type = ? AND scope_id = ? AND name = ?",
+            (*self._scope(group_id, user_id, is_global), identifier),
+        ).fetchone()
+        return row[0] if row else None
+
+    def add_server_addr(self, identifier: str, server_addr: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
+        if not identifier or not server_addr:
+            return False
+        if not self.check_server_addr(server_addr):
+            return False
+        # 同名时只更新地址，保持原有排列顺序
+        self._conn.execute(
+            "INSERT INTO servers (scope_type, scope_id, name, addr, canonical) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (scope_type, scope_id, name) DO UPDATE SET addr = excluded.addr, canonical = excluded.canonical",
+            (*self._scope(group_id, user_id, is_global), identifier, server_addr, canonical_addr(server_addr)),
+        )
+        self._bump_revision(group_id, user_id, is_global)
+        return True
+
+    def update_server_addr(self, identifier: str, new_server_addr: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
+        if not self.check_server_addr(new_server_addr):
+            return False
+        cursor = self._conn.execute(
+            "UPDATE servers SET addr = ?, canonical = ? WHERE scope_type = ? AND scope_id = ? AND name = ?",
+            (new_server_addr, canonical_addr(new_server_addr), *self._scope(group_id, user_id, is_global), identifier),
+        )
+        if cursor.rowcount == 0:
+            return False
+        self._bump_revision(group_id, user_id, is_global)
+        return True
+
+    def remove_server_addr(self, identifier: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
+        cursor = self._conn.execute(
+            "DELETE FROM servers WHERE scope_type = ? AND scope_id = ? AND name = ?",
+            (*self._scope(group_id, user_id, is_global), identifier),
+        )
+        if cursor.rowcount == 0:
+            return False
+        self._bump_revision(group_id, user_id, is_global)
+        return True
+
+    def clear_all_configs(self, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
+        try:
+            self._conn.execute(
+                "DELETE FROM servers WHERE scope_type = ? AND scope_id = ?",
+                self._scope(group_id, user_id, is_global),
+            )
+            self._bump_revision(group_id, user_id, is_global)
+            return True
+        except Exception as e:
+            logger.error(f"清除数据失败，错误原因：{e}")
+            return False
+
+    def has_identifier(self, identifier: str, group_id: str | None, user_id: str | None, is_global: bool = False) -> bool:
+        return self.get_server_addr(identifier, group_id, user_id, is_global) is not None
@@ -0,0 +1,69 @@
+import threading
+
+from PIL import ImageFont
+
+# 字形宽度缓存：字体标识 -> {字符: 宽度}
+_GLYPH_WIDTHS: dict[tuple, dict[str, float]] = {}
+_GLYPH_LOCK = threading.Lock()
+
+
+def _font_key(font: ImageFont.ImageFont | ImageFont.FreeTypeFont) -> tuple:
+    path = getattr(font, "path", None)
+    if path:
+        return path, getattr(font, "size", 0)
+    return "id", id(font)
+
+
+def _glyph_widths(font: ImageFont.ImageFont | ImageFont.FreeTypeFont) -> dict[str, float]:
+    key = _font_key(font)
+    widths = _GLYPH_WIDTHS.get(key)
+    if widths is None:
+        with _GLYPH_LOCK:
+            widths = _GLYPH_WIDTHS.setdefault(key, {})
+    return widths
+
+
+def char_width(font: ImageFont.ImageFont | ImageFont.FreeTypeFont, char: str, widths: dict[str, float] | None = None) -> float:
+    if widths is None:
+        widths = _glyph_widths(font)
+    width = widths.get(char)
+    if width is None:
+        width = font.getlength(char)
+        widths[char] = width
+    return width
+
+
+def text_width(text: str, font: ImageFont.ImageFont | ImageFont.FreeTypeFont) -> float:
+    """按字形宽度累加估算文本宽度（忽略字距调整）"""
+    widths = _glyph_widths(font)
+    return sum(char_width(font, char, widths) for char in text)
+
+
+def wrap_text(text: str, font: ImageFont.ImageFont | ImageFont.FreeTypeFont, max_width: float) -> list[str]:
+    """
+    按像素宽度逐字换行，单字宽度查缓存并增量累加，整体为线性复杂度
+    """
+    widths = _glyph_widths(font)
+    lines = []
+    current: list[str] = []
+    current_width = 0.0
+    for char in text:
+        width = char_width(font, char, widths)
+        if current_width + width > max_width and current:
+            lines.append("".join(current))
+            current = [char]
+            current_width = width
+        else:
+            current.append(char)
+            current_width += width
+    if current:
+        lines.append("".join(current))
+    return lines
+
+
+def truncate_text(text: str, font: ImageFont.ImageFont | ImageFont.FreeTypeFont, max_width: float, ellipsis: str = "…") -> str:
+    """超出宽度时截断并追加省略号"""
+    if text_width(text, font) <= max_width:
+        return text
+    lines = wrap_text(text, font, max(max_width - text_width(ellipsis, font), 0))
+    return (lines[0] if lines else "") + ellipsis
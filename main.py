@@ -1,4 +1,5 @@
 
+import astrbot.api.message_components as Comp
 from astrbot.api import AstrBotConfig, logger
 from astrbot.api.event import AstrMessageEvent, filter
 from astrbot.api.star import Context, Star, StarTools
@@ -6,6 +7,7 @@ from astrbot.core.platform.message_type import MessageType
 
 from .core.command_func import CommandFunc
 from .core.data_manager import DataManager
+from .core.sqlite_data_manager import SqliteDataManager
 
 plugin_version = "2.1.0"
 
@@ -17,14 +19,28 @@ class mcstatus(Star):
         self.bot_config = context.get_config()
         self.admin_list = self.bot_config["admins_id"]
 
-        self.datamanager = DataManager(config_dir=plugin_data_dir)
-        self.datamanager.load_config()
+        storage_conf = self.config.get("storage", {})
+        self.datamanager = None
+        data_loaded = False
+        if storage_conf.get("backend", "json") == "sqlite":
+            self.datamanager = SqliteDataManager(config_dir=plugin_data_dir)
+            data_loaded = self.datamanager.load_config()
+            if not data_loaded:
+                # 数据库无法打开时改用 json 存储，避免之后每条指令都因连接为空而出错
+                logger.error("SQLite 数据库打开失败，本次改用 json 存储")
+                self.datamanager = None
+        if self.datamanager is None:
+            self.datamanager = DataManager(config_dir=plugin_data_dir,
+                                           save_delay=storage_conf.get("save_delay", 1))
+            data_loaded = self.datamanager.load_config()
 
         self.commandFunc = CommandFunc(admin_list=self.admin_list,
                                        datamanager=self.datamanager,
                                        plugin_version=plugin_version,
                                        config=self.config,
-                                       plugin_data_dir=str(plugin_data_dir))
+                                       plugin_data_dir=str(plugin_data_dir),
+                                       data_loaded=data_loaded)
+        self.commandFunc.start_poller()
 
     def enabled_session_check(self, event: AstrMessageEvent) -> bool:
         """权限检查"""
@@ -72,7 +88,7 @@ class mcstatus(Star):
             return
 
         # 初始化返回结果变量
-        result_tuple: tuple[bool, str] = (False, "")
+        result_tuple: tuple[bool, str | bytes] = (False, "")
 
         match subcommand:
             case "":
@@ -90,9 +106,15 @@ class mcstatus(Star):
             case "set":
                  result_tuple = await self.commandFunc._handle_set(event=event, server_name=command_text_a, server_addr=command_text_b)
             case "list":
-                 result_tuple = await self.commandFunc._handle_list(event=event)
+                 result_tuple = await self.commandFunc._handle_list(event=event, page=command_text_a)
+            case "all":
+                 result_tuple = await self.commandFunc._handle_all(event=event, page=command_text_a)
+            case "trend":
+                 result_tuple = await self.commandFunc._handle_trend(event=event, server_name=command_text_a, range_name=command_text_b)
             case "clear":
                  result_tuple = await self.commandFunc._handle_clear(event=event)
+            case "stats":
+                 result_tuple = await self.commandFunc._handle_stats(event=event)
             case "help":
                  result_tuple = await self.commandFunc._handle_help(event=event)
             case _:
@@ -101,10 +123,16 @@ class mcstatus(Star):
         # 根据返回的 tuple 判断发送图片还是文本
         is_image, data = result_tuple
         if is_image:
-            yield event.image_result(data)
+            # 内存模式返回图片数据，文件模式返回图片路径
+            if isinstance(data, bytes):
+                yield event.chain_result([Comp.Image.fromBytes(data)])
+            else:
+                yield event.image_result(data)
         else:
             yield event.plain_result(data)
 
     async def terminate(self):
-        if self.datamanager.save_config():
+        await self.commandFunc.stop_poller()
+        self.commandFunc.shutdown()
+        if await self.datamanager.close():
             logger.info("数据保存成功，已卸载插件！")
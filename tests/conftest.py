@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 与 benchmarks 相同，直接从插件根目录导入 core
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,145 @@
+"""
+SRV 解析缓存与探测候选地址的测试，使用假的 query 函数，不访问网络
+"""
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("astrbot.api")
+
+from core.resolver import DEFAULT_PORT, SrvResolver  # noqa: E402
+
+
+class FakeQuery:
+    """记录调用次数，按名称返回预设结果；结果为异常实例时抛出"""
+
+    def __init__(self, answers: dict, delay: float = 0):
+        self.answers = answers
+        self.delay = delay
+        self.calls: list[str] = []
+
+    async def __call__(self, name: str):
+        self.calls.append(name)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        answer = self.answers.get(name)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def remaining_ttl(resolver: SrvResolver, host: str) -> float:
+    return resolver._data[host][0] - time.monotonic()
+
+
+def test_srv_record_is_resolved_and_cached():
+    query = FakeQuery({"_minecraft._tcp.example.com": ("play.example.net", 25570, 60)})
+    resolver = SrvResolver(query=query)
+
+    async def run():
+        first = await resolver.resolve("Example.COM.")
+        second = await resolver.resolve("example.com")
+        return first, second
+
+    assert asyncio.run(run()) == (("play.example.net", 25570), ("play.example.net", 25570))
+    assert query.calls == ["_minecraft._tcp.example.com"]
+
+
+@pytest.mark.parametrize("record_ttl, expected", [(1, 30), (600, 600), (86400, 3600)])
+def test_ttl_is_clamped(record_ttl, expected):
+    query = FakeQuery({"_minecraft._tcp.example.com": ("play.example.net", 25570, record_ttl)})
+    resolver = SrvResolver(query=query, min_ttl=30, max_ttl=3600)
+    asyncio.run(resolver.resolve("example.com"))
+    assert expected - 5 < remaining_ttl(resolver, "example.com") <= expected
+
+
+def test_missing_record_is_negatively_cached():
+    query = FakeQuery({})
+    resolver = SrvResolver(query=query, negative_ttl=300)
+
+    async def run():
+        return [await resolver.resolve("nosrv.example") for _ in range(3)]
+
+    assert asyncio.run(run()) == [("nosrv.example", DEFAULT_PORT)] * 3
+    assert len(query.calls) == 1
+    assert 295 < remaining_ttl(resolver, "nosrv.example") <= 300
+
+
+def test_negative_ttl_zero_disables_negative_cache():
+    query = FakeQuery({})
+    resolver = SrvResolver(query=query, negative_ttl=0)
+
+    async def run():
+        await resolver.resolve("nosrv.example")
+        await resolver.resolve("nosrv.example")
+
+    asyncio.run(run())
+    assert len(query.calls) == 2
+
+
+def test_resolver_error_is_not_cached():
+    query = FakeQuery({"_minecraft._tcp.flaky.example": OSError("timeout")})
+    resolver = SrvResolver(query=query)
+
+    async def run():
+        return [await resolver.resolve("flaky.example") for _ in range(2)]
+
+    assert asyncio.run(run()) == [("flaky.example", DEFAULT_PORT)] * 2
+    assert len(query.calls) == 2
+    assert "flaky.example" not in resolver._data
+
+
+def test_concurrent_lookups_are_coalesced():
+    query = FakeQuery({"_minecraft._tcp.example.com": ("play.example.net", 25570, 60)}, delay=0.05)
+    resolver = SrvResolver(query=query)
+
+    async def run():
+        return await asyncio.gather(*(resolver.resolve("example.com") for _ in range(10)))
+
+    assert asyncio.run(run()) == [("play.example.net", 25570)] * 10
+    assert len(query.calls) == 1
+    assert not resolver._inflight
+
+
+@pytest.mark.parametrize("host", ["127.0.0.1", "203.0.113.7", "::1"])
+def test_ip_literal_skips_srv_lookup(host):
+    query = FakeQuery({})
+    resolver = SrvResolver(query=query)
+    assert asyncio.run(resolver.resolve(host)) == (host, DEFAULT_PORT)
+    assert query.calls == []
+    assert not resolver._data
+
+
+@pytest.fixture
+def command_func():
+    pytest.importorskip("mcstatus")
+    pytest.importorskip("astrbot.api.event")
+    from core.command_func import CommandFunc
+
+    # 只测试候选地址的选择，不需要完整初始化
+    return CommandFunc.__new__(CommandFunc)
+
+
+def test_probe_candidates_without_srv_probe_once(command_func):
+    query = FakeQuery({})
+    command_func.resolver = SrvResolver(query=query)
+    assert asyncio.run(command_func._probe_candidates("nosrv.example")) == ["nosrv.example"]
+
+
+def test_probe_candidates_with_srv_race_both(command_func):
+    query = FakeQuery({"_minecraft._tcp.example.com": ("play.example.net", 25570, 60)})
+    command_func.resolver = SrvResolver(query=query)
+    assert asyncio.run(command_func._probe_candidates("example.com")) == ["example.com", "example.com:25565"]
+
+
+def test_probe_candidates_explicit_port_skips_srv(command_func):
+    query = FakeQuery({"_minecraft._tcp.example.com": ("play.example.net", 25570, 60)})
+    command_func.resolver = SrvResolver(query=query)
+    assert asyncio.run(command_func._probe_candidates("example.com:25565")) == ["example.com:25565"]
+    assert query.calls == []
+
+
+def test_probe_candidates_without_resolver_race_both(command_func):
+    command_func.resolver = None
+    assert asyncio.run(command_func._probe_candidates("example.com")) == ["example.com", "example.com:25565"]